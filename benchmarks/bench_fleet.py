@@ -0,0 +1,172 @@
+"""Drive many simulated MPC-HC players through the integration coordinators.
+
+Usage: python benchmarks/bench_fleet.py [--players N] [--duration SECONDS] [--interval SECONDS]
+                                        [--latency MS] [--jitter MS] [--failure-rate RATIO]
+
+The simulated players run in a separate process (simulator.py) so the CPU
+and memory figures only account for the integration side. Each player has
+its MpcHcCoordinator, all of them sharing one FleetPoller like the config
+entries do, refreshed every interval with a command sent every few polls
+the way the media player sends them. The update latency is the duration of
+a refresh : waiting for a fleet slot, status.html or variables.html with
+the status merge, events, resume index and playback clock. Requires the
+Home Assistant development environment (pytest-homeassistant-custom-component).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import pathlib
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_test_home_assistant  # noqa: E402
+
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT  # noqa: E402
+
+from custom_components.mpchc.client import MpcHcClient, MpcHcConnectionError  # noqa: E402
+from custom_components.mpchc.const import DEFAULT_NAME, DOMAIN  # noqa: E402
+from custom_components.mpchc.coordinator import MpcHcCoordinator  # noqa: E402
+from custom_components.mpchc.fleet import FleetPoller  # noqa: E402
+
+COMMANDS = ("887", "888", "907", "908")
+
+
+class PlayerStats:
+    """Measurements of one polled player."""
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.commands = 0
+
+
+async def _async_poll(coordinator: MpcHcCoordinator, stats: PlayerStats, interval: float, deadline: float,
+                      command_every: int) -> None:
+    loop = asyncio.get_running_loop()
+    polls = 0
+    next_poll = loop.time()
+    while next_poll < deadline:
+        await asyncio.sleep(max(0.0, next_poll - loop.time()))
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        if coordinator.last_update_success:
+            stats.latencies.append(time.perf_counter() - start)
+        else:
+            stats.errors += 1
+        polls += 1
+        if command_every and polls % command_every == 0:
+            command = COMMANDS[polls // command_every % len(COMMANDS)]
+            coordinator.async_apply_command(command)
+            try:
+                await coordinator.client.async_send_command(command)
+            except MpcHcConnectionError:
+                coordinator.async_rollback()
+                stats.errors += 1
+            else:
+                coordinator.async_command_sent()
+                stats.commands += 1
+        next_poll += interval
+
+
+def _coordinator(hass, fleet: FleetPoller, port: int) -> MpcHcCoordinator:
+    """Return the coordinator of a player set up like a config entry (without entities)."""
+    config_entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id=f"{DOMAIN}-http://127.0.0.1:{port}",
+        data={CONF_NAME: DEFAULT_NAME, CONF_HOST: "http://127.0.0.1", CONF_PORT: port},
+    )
+    config_entry.add_to_hass(hass)
+    client = MpcHcClient(f"http://127.0.0.1:{port}", fleet.async_poll)
+    return MpcHcCoordinator(hass, config_entry, client, fleet)
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return float("nan")
+    return statistics.quantiles(values, n=100, method="inclusive")[int(percent) - 1] if len(values) > 1 else values[0]
+
+
+async def _async_main(options: argparse.Namespace) -> None:
+    simulator = subprocess.Popen(
+        [
+            sys.executable, str(ROOT / "simulator.py"),
+            "--players", str(options.players),
+            "--base-port", str(options.base_port),
+            "--latency", str(options.latency),
+            "--jitter", str(options.jitter),
+            "--failure-rate", str(options.failure_rate),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        # Wait for the simulator to listen on every port
+        print(simulator.stdout.readline().strip())
+
+        # The resume indexes are saved to a throwaway config directory
+        with tempfile.TemporaryDirectory() as config_dir:
+            async with async_test_home_assistant() as hass:
+                hass.config.config_dir = config_dir
+                tracemalloc.start()
+                memory_before = tracemalloc.get_traced_memory()[0]
+                fleet = FleetPoller()
+                coordinators = [_coordinator(hass, fleet, options.base_port + index) for index in range(options.players)]
+                stats = [PlayerStats() for _ in coordinators]
+
+                loop = asyncio.get_running_loop()
+                cpu_start = time.process_time()
+                wall_start = loop.time()
+                await asyncio.gather(*(
+                    _async_poll(coordinator, player_stats, options.interval, wall_start + options.duration,
+                                options.command_every)
+                    for coordinator, player_stats in zip(coordinators, stats)
+                ))
+                wall = loop.time() - wall_start
+                cpu = time.process_time() - cpu_start
+                memory = tracemalloc.get_traced_memory()[0] - memory_before
+                tracemalloc.stop()
+                clients = [coordinator.client for coordinator in coordinators]
+                await asyncio.gather(*(coordinator.async_shutdown() for coordinator in coordinators))
+                await hass.async_stop(force=True)
+    finally:
+        simulator.terminate()
+        simulator.wait()
+
+    latencies = [latency for player_stats in stats for latency in player_stats.latencies]
+    polls = sum(client.stats.poll_latency().count for client in clients)
+    print(f"players            {options.players}")
+    print(f"polls/sec          {polls / wall:.1f}")
+    print(f"errors             {sum(player_stats.errors for player_stats in stats)}")
+    print(f"commands           {sum(player_stats.commands for player_stats in stats)}")
+    print(f"bytes per poll     {sum(client.stats.bytes_received for client in clients) / max(polls, 1):.0f}")
+    print(f"update latency p50 {_percentile(latencies, 50) * 1000:.2f} ms")
+    print(f"update latency p99 {_percentile(latencies, 99) * 1000:.2f} ms")
+    print(f"cpu per player     {cpu / wall / options.players * 1000:.3f} ms/s")
+    print(f"memory per player  {memory / options.players / 1024:.1f} KiB")
+    print(f"max rss            {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args.add_argument("--players", type=int, default=200)
+    args.add_argument("--duration", type=float, default=30.0)
+    args.add_argument("--interval", type=float, default=2.0, help="Refresh interval in seconds")
+    args.add_argument("--command-every", type=int, default=10, help="Send a command every N polls (0 to disable)")
+    args.add_argument("--base-port", type=int, default=23579)
+    args.add_argument("--latency", type=float, default=5.0, help="Simulated response latency in ms")
+    args.add_argument("--jitter", type=float, default=2.0, help="Simulated latency jitter in ms")
+    args.add_argument("--failure-rate", type=float, default=0.0, help="Ratio of failed requests")
+    asyncio.run(_async_main(args.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Benchmark the variables.html parser against the former regex implementation.
+
+Usage: python benchmarks/bench_parser.py [--number N] [--chunk-size BYTES]
+
+Reports, for every captured page in benchmarks/samples, the parse time and the
+number/size of memory allocations per poll.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import pathlib
+import re
+import timeit
+import tracemalloc
+
+ROOT = pathlib.Path(__file__).resolve().parent
+SAMPLES = ROOT / "samples"
+COMPONENT = ROOT.parent / "custom_components" / "mpchc"
+
+
+def _load(name: str):
+    """Load a standalone module of the integration without Home Assistant."""
+    spec = importlib.util.spec_from_file_location(f"mpchc_{name}", COMPONENT / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+parser = _load("parser")
+
+
+def legacy_parse(data: bytes) -> dict[str, str]:
+    """Former implementation : decode the whole body, regex scan, lowercase."""
+    return {key: value.lower() for key, value in re.findall(r'<p id="(.+?)">(.+?)</p>', data.decode("utf-8"))}
+
+
+def streamed_parse(chunks: list[bytes]) -> dict[str, str]:
+    """New implementation fed chunk by chunk as it would be from the socket."""
+    variables_parser = parser.VariablesParser()
+    for chunk in chunks:
+        variables_parser.feed(chunk)
+    return variables_parser.result()
+
+
+def allocations(func, *args) -> tuple[int, int]:
+    """Return the number of blocks and bytes allocated by one call."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = func(*args)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    del result
+    return sum(max(stat.count_diff, 0) for stat in stats), sum(max(stat.size_diff, 0) for stat in stats)
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__)
+    args.add_argument("--number", type=int, default=10000)
+    args.add_argument("--chunk-size", type=int, default=4096)
+    options = args.parse_args()
+
+    print(f"{'sample':28} {'impl':8} {'us/poll':>8} {'blocks':>7} {'bytes':>7}")
+    for sample in sorted(SAMPLES.glob("variables_*.html")):
+        data = sample.read_bytes()
+        chunks = [data[i:i + options.chunk_size] for i in range(0, len(data), options.chunk_size)]
+        for name, func, arg in (("regex", legacy_parse, data), ("stream", streamed_parse, chunks)):
+            seconds = min(timeit.repeat(lambda: func(arg), number=options.number, repeat=5))
+            blocks, size = allocations(func, arg)
+            print(f"{sample.name:28} {name:8} {seconds / options.number * 1e6:8.2f} {blocks:7d} {size:7d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Replay a traffic recording through the parsers and the player state logic.
+
+Usage: python benchmarks/replay.py RECORDING [--speed FACTOR] [--events]
+
+RECORDING is a file written by the mpchc.start_recording service (rotated
+files next to it are replayed first). Every variables.html and status.html
+page goes through the parsers, the typed player state and the playback clock
+in the recorded order, with the recorded timestamps, ``--speed`` times faster
+than real time (0, the default, for as fast as possible). The coordinator
+itself is not run: the choice of the page to poll, the optimistic commands
+and the events are left out, only the parsing and the state merging are
+replayed.
+
+Reports the parse time per page, the pages without a state (bad parses) and
+the state changes. With ``--events`` the changes are printed as JSON lines:
+comparing this output between two versions of the integration makes a
+regression test which doesn't need a live MPC-HC.
+"""
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import importlib
+import json
+import pathlib
+import sys
+import time
+import types
+
+COMPONENT = pathlib.Path(__file__).resolve().parent.parent / "custom_components" / "mpchc"
+
+
+def _load_package():
+    """Load the standalone modules of the integration without Home Assistant."""
+    package = types.ModuleType("mpchc")
+    package.__path__ = [str(COMPONENT)]
+    sys.modules["mpchc"] = package
+    return (
+        importlib.import_module("mpchc.parser"),
+        importlib.import_module("mpchc.state"),
+        importlib.import_module("mpchc.clock"),
+        importlib.import_module("mpchc.recorder"),
+        importlib.import_module("mpchc.stats"),
+    )
+
+
+parser, state_model, clock_model, recorder, stats = _load_package()
+
+
+class Replay:
+    """Player state rebuilt from the recorded pages with the parsers, merger and clock of the integration."""
+
+    def __init__(self, print_events: bool):
+        self.print_events = print_events
+        self.clock = clock_model.PlaybackClock()
+        self.merger = state_model.StatusMerger()
+        self.tracker = state_model.StateChanges()
+        self.counts: dict[str, int] = {}
+        self.parse_times: list[float] = []
+        self.bad_pages = 0
+        self.changes = 0
+
+    @property
+    def state(self):
+        """Return the last state read from the player."""
+        return self.tracker.state
+
+    def feed(self, record: dict) -> None:
+        kind = record["kind"]
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        now = dt.datetime.fromtimestamp(record["t"], dt.timezone.utc)
+        if kind == "variables":
+            start = time.perf_counter()
+            new_state = state_model.PlayerState.from_variables(parser.parse_variables(record["body"].encode("utf-8")))
+            self.parse_times.append(time.perf_counter() - start)
+            self.merger.learn(new_state)
+        elif kind == "status":
+            start = time.perf_counter()
+            status = parser.parse_status(record["body"].encode("utf-8"))
+            self.parse_times.append(time.perf_counter() - start)
+            if status is None:
+                self.bad_pages += 1
+                return
+            if self.state is None:
+                return
+            new_state = self.merger.merge(self.state, status)
+            if new_state is None:
+                # The coordinator read variables.html next, it is the following record
+                return
+        elif kind == "error" and record["body"].split(":", 1)[0] in stats.POLL_KINDS:
+            # Only a failed poll makes the player unavailable (not a snapshot, a command...)
+            new_state = None
+            self.merger.reset()
+            self.clock.reset()
+        else:
+            return
+        if kind != "error":
+            self.bad_pages += new_state.state is None
+            self.clock.sync(new_state, now)
+        changes = self.tracker.update(new_state)
+        if changes:
+            self.changes += 1
+            if self.print_events:
+                print(json.dumps({"t": record["t"], "changes": changes}, ensure_ascii=False))
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args.add_argument("recording")
+    args.add_argument("--speed", type=float, default=0.0, help="Replay speed factor, 0 for as fast as possible")
+    args.add_argument("--events", action="store_true", help="Print the state changes as JSON lines")
+    options = args.parse_args()
+
+    replay = Replay(options.events)
+    wall_start = time.perf_counter()
+    first = None
+    for record in recorder.read_recording(options.recording):
+        if options.speed > 0:
+            first = first if first is not None else record["t"]
+            time.sleep(max(0.0, (record["t"] - first) / options.speed - (time.perf_counter() - wall_start)))
+        replay.feed(record)
+    wall = time.perf_counter() - wall_start
+
+    output = sys.stderr if options.events else sys.stdout
+    pages = len(replay.parse_times)
+    print(f"records            {sum(replay.counts.values())} {replay.counts}", file=output)
+    print(f"state changes      {replay.changes}", file=output)
+    print(f"pages w/o state    {replay.bad_pages}", file=output)
+    if pages:
+        print(f"parse mean         {sum(replay.parse_times) / pages * 1e6:.1f} us", file=output)
+        print(f"parse max          {max(replay.parse_times) * 1e6:.1f} us", file=output)
+    print(f"replay time        {wall:.3f} s", file=output)
+
+
+if __name__ == "__main__":
+    main()
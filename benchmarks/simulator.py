@@ -0,0 +1,313 @@
+"""Local stand-in for the MPC-HC web interface.
+
+Serves variables.html, status.html, command.html, browser.html and
+snapshot.jpg for simulated players with controllable playback, latency, jitter and failures.
+
+Usage: python benchmarks/simulator.py [--players N] [--base-port PORT]
+                                      [--latency MS] [--jitter MS] [--failure-rate RATIO]
+
+Player i listens on base-port + i. The module can also be imported to run
+simulated players inside another script (see bench_fleet.py).
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import html
+import random
+import time
+from urllib.parse import quote, urlencode
+
+from aiohttp import web
+
+STATE_CLOSED = -1
+STATE_STOPPED = 0
+STATE_PAUSED = 1
+STATE_PLAYING = 2
+LIBRARY_ROOT = "D:\\Movies"
+LIBRARY_SIZE = 500
+# Smallest valid JPEG (1x1 pixel), served as snapshot.jpg
+SNAPSHOT = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQEASABIAAD/2wBDAP//////////////////////////////////////////////////////////////////"
+    "////////////////////wgALCAABAAEBAREA/8QAFBABAAAAAAAAAAAAAAAAAAAAAP/aAAgBAQABPxA="
+)
+STATE_STRINGS = {STATE_CLOSED: "", STATE_STOPPED: "Stopped", STATE_PAUSED: "Paused", STATE_PLAYING: "Playing"}
+
+
+def _time_string(milliseconds: float) -> str:
+    seconds = int(milliseconds // 1000)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+def _parse_time_string(value: str) -> int:
+    """Parse a H:MM:SS[.ms] position sent by the integration into ms."""
+    hours, minutes, seconds = value.split(":")
+    return int((int(hours) * 3600 + int(minutes) * 60 + float(seconds)) * 1000)
+
+
+def _js_string(value: str) -> str:
+    """Escape a string for a double quoted JavaScript literal, as MPC-HC does."""
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class SimulatedPlayer:
+    """Playback model of one MPC-HC instance."""
+
+    def __init__(self, filepath: str, duration: int, state: int = STATE_PLAYING, volume: int = 80):
+        """Initialize the player with a file of the given duration in ms."""
+        self.filepath = filepath
+        self.duration = duration
+        self.state = state
+        self.volume = volume
+        self.muted = False
+        self.rate = 1.0
+        self._position = 0.0
+        self._anchor = time.monotonic()
+        self.commands: list[tuple[str, dict[str, str]]] = []
+
+    @property
+    def file(self) -> str:
+        return self.filepath.rsplit("\\", 1)[-1] if self.state != STATE_CLOSED else ""
+
+    @property
+    def filedir(self) -> str:
+        return self.filepath.rsplit("\\", 1)[0] if self.state != STATE_CLOSED else ""
+
+    @property
+    def position(self) -> float:
+        """Return the current position in ms."""
+        if self.state != STATE_PLAYING:
+            return self._position
+        position = self._position + (time.monotonic() - self._anchor) * 1000 * self.rate
+        if position >= self.duration:
+            self._set(self.duration, STATE_STOPPED)
+            return self.duration
+        return position
+
+    def _set(self, position: float, state: int | None = None) -> None:
+        self._position = min(max(position, 0.0), self.duration)
+        self._anchor = time.monotonic()
+        if state is not None:
+            self.state = state
+
+    def command(self, command_id: str, params: dict[str, str]) -> None:
+        """Apply a command.html request."""
+        self.commands.append((command_id, params))
+        position = self.position
+        if command_id == "887":
+            self._set(position, STATE_PLAYING)
+        elif command_id == "888":
+            self._set(position, STATE_PAUSED)
+        elif command_id == "889":
+            self._set(position, STATE_PAUSED if self.state == STATE_PLAYING else STATE_PLAYING)
+        elif command_id == "890":
+            self._set(0, STATE_STOPPED)
+        elif command_id == "804":
+            self._set(0, STATE_CLOSED)
+        elif command_id == "909":
+            self.muted = not self.muted
+        elif command_id == "907":
+            self.volume = min(self.volume + 5, 100)
+        elif command_id == "908":
+            self.volume = max(self.volume - 5, 0)
+        elif command_id == "-2":
+            self.volume = min(max(int(params["volume"]), 0), 100)
+        elif command_id == "-1":
+            self._set(_parse_time_string(params["position"]))
+        elif command_id in ("895", "894", "896"):
+            self._set(position)
+            self.rate = {"895": min(self.rate * 2, 16.0), "894": max(self.rate / 2, 0.125), "896": 1.0}[command_id]
+
+    def variables_html(self) -> str:
+        """Render variables.html."""
+        position = self.position
+        closed = self.state == STATE_CLOSED
+        variables = {
+            "file": self.file,
+            "filepatharg": "" if closed else quote(self.filepath, safe=":"),
+            "filepath": "" if closed else self.filepath,
+            "filedirarg": "" if closed else quote(self.filedir, safe=":"),
+            "filedir": self.filedir,
+            "state": self.state,
+            "statestring": STATE_STRINGS[self.state],
+            "position": int(position),
+            "positionstring": _time_string(position),
+            "duration": 0 if closed else self.duration,
+            "durationstring": _time_string(0 if closed else self.duration),
+            "volumelevel": self.volume,
+            "muted": int(self.muted),
+            "playbackrate": f"{self.rate:g}",
+            "size": "" if closed else "1.2 GB",
+            "reloadtime": 0,
+            "version": "1.9.24.0",
+        }
+        lines = "\n".join(f'<p id="{key}">{html.escape(str(value), quote=False)}</p>' for key, value in variables.items())
+        return (
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            "<title>MPC-HC WebServer - Variables</title>\n</head>\n"
+            f'<body class="page-variables">\n{lines}\n</body>\n</html>\n'
+        )
+
+    def status_html(self) -> str:
+        """Render the compact status.html line."""
+        position = self.position
+        title = _js_string(self.file)
+        path = _js_string(self.filepath) if self.state != STATE_CLOSED else ""
+        return (
+            f'OnStatus("{title}", "{STATE_STRINGS[self.state]}", {int(position)}, "{_time_string(position)}", '
+            f'{self.duration}, "{_time_string(self.duration)}", {int(self.muted)}, {self.volume}, "{path}")'
+        )
+
+    def open(self, filepath: str) -> None:
+        """Open a file from the start, as when clicked in the file browser."""
+        self.filepath = filepath
+        self.rate = 1.0
+        self._set(0, STATE_PLAYING)
+
+    def browser_html(self, path: str | None) -> str:
+        """Render the browser.html listing of a folder of the simulated library."""
+        folder = path or LIBRARY_ROOT
+        count = LIBRARY_SIZE if folder == LIBRARY_ROOT else 12
+        folders = [f"{LIBRARY_ROOT}\\Series"] if folder == LIBRARY_ROOT else []
+        files = [f"{folder}\\Movie {index:04d}.mkv" for index in range(count)]
+        rows = [("dir", f"{folder}\\..", "..")]
+        rows += [("dir", entry, entry.rsplit("\\", 1)[-1]) for entry in folders]
+        rows += [("file", entry, entry.rsplit("\\", 1)[-1]) for entry in files]
+        lines = "\n".join(
+            f'<tr class="{row_class}"><td class="{row_class}name">'
+            f'<a href="browser.html?{html.escape(urlencode({"path": entry}))}">{html.escape(name)}</a></td></tr>'
+            for row_class, entry, name in rows
+        )
+        return (
+            '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+            "<title>MPC-HC WebServer - File Browser</title>\n</head>\n"
+            f'<body class="page-file-browser">\n<table class="browser-table">\n{lines}\n</table>\n</body>\n</html>\n'
+        )
+
+
+class SimulatorOptions:
+    """Network behaviour of a simulated web interface."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, failure_rate: float = 0.0):
+        """Initialize with latency and jitter in seconds and a failure ratio."""
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+
+
+def create_app(player: SimulatedPlayer, options: SimulatorOptions | None = None) -> web.Application:
+    """Create the web application serving one player."""
+    options = options or SimulatorOptions()
+
+    @web.middleware
+    async def network(request: web.Request, handler):
+        delay = options.latency + random.uniform(-options.jitter, options.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if options.failure_rate and random.random() < options.failure_rate:
+            if random.random() < 0.5:
+                raise web.HTTPInternalServerError()
+            # Drop the connection like a player going to sleep
+            request.transport.close()
+            return web.Response(status=500)
+        return await handler(request)
+
+    async def variables(request: web.Request) -> web.Response:
+        return web.Response(text=player.variables_html(), content_type="text/html")
+
+    async def status(request: web.Request) -> web.Response:
+        return web.Response(text=player.status_html(), content_type="text/html")
+
+    async def command(request: web.Request) -> web.Response:
+        params = dict(request.query)
+        if request.method == "POST" and request.can_read_body:
+            params.update(await request.post())
+        command_id = params.pop("wm_command", None)
+        if command_id is None:
+            raise web.HTTPBadRequest()
+        player.command(command_id, params)
+        return web.Response(text="", content_type="text/html")
+
+    async def browser(request: web.Request) -> web.Response:
+        path = request.query.get("path")
+        if path and path.endswith(".mkv"):
+            player.open(path)
+            path = path.rsplit("\\", 1)[0]
+        return web.Response(text=player.browser_html(path), content_type="text/html")
+
+    async def snapshot(request: web.Request) -> web.Response:
+        if player.state in (STATE_CLOSED, STATE_STOPPED):
+            raise web.HTTPNotFound()
+        return web.Response(body=SNAPSHOT, content_type="image/jpeg")
+
+    app = web.Application(middlewares=[network])
+    app["player"] = player
+    app.router.add_get("/variables.html", variables)
+    app.router.add_get("/status.html", status)
+    app.router.add_route("*", "/command.html", command)
+    app.router.add_get("/browser.html", browser)
+    app.router.add_get("/snapshot.jpg", snapshot)
+    return app
+
+
+def create_players(count: int) -> list[SimulatedPlayer]:
+    """Create players in various states, mostly playing."""
+    states = (STATE_PLAYING, STATE_PLAYING, STATE_PAUSED, STATE_STOPPED, STATE_CLOSED)
+    return [
+        SimulatedPlayer(
+            f"D:\\Movies\\Movie {index:04d}.mkv",
+            duration=random.randint(20, 180) * 60 * 1000,
+            state=states[index % len(states)],
+        )
+        for index in range(count)
+    ]
+
+
+async def async_start(players: list[SimulatedPlayer], base_port: int,
+                      options: SimulatorOptions | None = None) -> list[web.AppRunner]:
+    """Serve each player on base_port + index."""
+    runners = []
+    for index, player in enumerate(players):
+        runner = web.AppRunner(create_app(player, options), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", base_port + index).start()
+        runners.append(runner)
+    return runners
+
+
+async def async_stop(runners: list[web.AppRunner]) -> None:
+    """Stop serving the players."""
+    await asyncio.gather(*(runner.cleanup() for runner in runners))
+
+
+async def _async_main(options: argparse.Namespace) -> None:
+    players = create_players(options.players)
+    runners = await async_start(
+        players,
+        options.base_port,
+        SimulatorOptions(options.latency / 1000, options.jitter / 1000, options.failure_rate),
+    )
+    print(f"Serving {len(players)} players on 127.0.0.1:{options.base_port}-{options.base_port + len(players) - 1}",
+          flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await async_stop(runners)
+
+
+def main() -> None:
+    args = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    args.add_argument("--players", type=int, default=1)
+    args.add_argument("--base-port", type=int, default=13579)
+    args.add_argument("--latency", type=float, default=0.0, help="Response latency in ms")
+    args.add_argument("--jitter", type=float, default=0.0, help="Latency jitter in ms")
+    args.add_argument("--failure-rate", type=float, default=0.0, help="Ratio of failed requests")
+    try:
+        asyncio.run(_async_main(args.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
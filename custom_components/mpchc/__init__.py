@@ -1,17 +1,36 @@
 """The mpchc component."""
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_MAC, Platform
+from homeassistant.const import CONF_HOST, CONF_PORT, Platform
 from homeassistant.core import HomeAssistant
-from .const import DOMAIN
+from .client import MpcHcClient
+from .const import DOMAIN, DATA_FLEET
+from .coordinator import MpcHcCoordinator
+from .fleet import FleetPoller
+from .resume import async_remove_index
+from .services import async_setup_services, async_unload_services
 
 
-PLATFORMS = [Platform.MEDIA_PLAYER, Platform.REMOTE]
+PLATFORMS = [Platform.MEDIA_PLAYER, Platform.REMOTE, Platform.SENSOR]
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
     config_entry.async_on_unload(config_entry.add_update_listener(update_listener))
     hass.data.setdefault(DOMAIN, {})
+    if DATA_FLEET not in hass.data[DOMAIN]:
+        hass.data[DOMAIN][DATA_FLEET] = FleetPoller()
+    fleet: FleetPoller = hass.data[DOMAIN][DATA_FLEET]
+    # The fleet slot is only held during the requests of the polls
+    client = MpcHcClient(f'{config_entry.data[CONF_HOST]}:{config_entry.data[CONF_PORT]}', fleet.async_poll)
+    coordinator = MpcHcCoordinator(hass, config_entry, client, fleet)
+    await coordinator.resume.async_load()
+    hass.data[DOMAIN][config_entry.entry_id] = coordinator
+    async_setup_services(hass)
+    # Entities restore their last known state : don't hold the setup on a player which may be slow or closed,
+    # the first polls of all the players are capped by the fleet poller
     await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
+    config_entry.async_create_background_task(
+        hass, coordinator.async_refresh(), f"{DOMAIN} first refresh {client.url}"
+    )
     return True
 
 
@@ -21,10 +40,19 @@ async def async_unload_entry(hass: HomeAssistant, confid_entry: ConfigEntry) ->
         confid_entry, PLATFORMS
     )
     if unload_ok and confid_entry.entry_id in hass.data[DOMAIN]:
-        hass.data[DOMAIN].pop(confid_entry.entry_id)
+        coordinator: MpcHcCoordinator = hass.data[DOMAIN].pop(confid_entry.entry_id)
+        await coordinator.async_shutdown()
+        if hass.data[DOMAIN].keys() == {DATA_FLEET}:
+            hass.data[DOMAIN].pop(DATA_FLEET)
+            async_unload_services(hass)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Delete the resume index of a removed player."""
+    await async_remove_index(hass, config_entry)
+
+
 async def update_listener(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
     """Handle options update."""
     await hass.config_entries.async_reload(config_entry.entry_id)
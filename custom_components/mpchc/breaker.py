@@ -0,0 +1,69 @@
+"""Circuit breaker failing fast while an MPC-HC player is unreachable."""
+from __future__ import annotations
+
+from time import monotonic
+
+from .const import BREAKER_THRESHOLD, BREAKER_BASE_BACKOFF, BREAKER_MAX_BACKOFF
+
+
+class CircuitBreaker:
+    """Track consecutive connection failures of one host.
+
+    After ``threshold`` consecutive failures the breaker opens and requests
+    are rejected without touching the network. Once the backoff has elapsed a
+    single request is let through as a probe : the breaker closes if it
+    succeeds, otherwise it opens again with a doubled backoff.
+    """
+
+    def __init__(
+        self,
+        threshold: int = BREAKER_THRESHOLD,
+        base_backoff: float = BREAKER_BASE_BACKOFF.total_seconds(),
+        max_backoff: float = BREAKER_MAX_BACKOFF.total_seconds(),
+    ):
+        """Initialize a closed breaker."""
+        self._threshold = threshold
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+        self._backoff = base_backoff
+        self._failures = 0
+        self._retry_at = 0.0
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        """Return True while the host is considered unreachable."""
+        return self._failures >= self._threshold
+
+    def allow(self) -> bool:
+        """Return True if a request may be sent now."""
+        if not self.is_open:
+            return True
+        if self._probing or monotonic() < self._retry_at:
+            return False
+        self._probing = True
+        return True
+
+    def success(self) -> bool:
+        """Record a successful request, return True if the breaker closed."""
+        was_open = self.is_open
+        self._failures = 0
+        self._backoff = self._base_backoff
+        self._probing = False
+        return was_open
+
+    def failure(self) -> bool:
+        """Record a connection failure, return True if the breaker just opened."""
+        self._failures += 1
+        if self._probing:
+            self._backoff = min(self._backoff * 2, self._max_backoff)
+            self._retry_at = monotonic() + self._backoff
+            self._probing = False
+        elif self._failures == self._threshold:
+            self._retry_at = monotonic() + self._backoff
+            return True
+        return False
+
+    def release(self) -> None:
+        """Forget a probe which ended without an outcome (e.g. cancelled)."""
+        self._probing = False
@@ -0,0 +1,75 @@
+"""Directory listings of the MPC-HC file browser (browser.html)."""
+from __future__ import annotations
+
+import html
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from urllib.parse import parse_qs, urlsplit
+
+from .const import BROWSER_CACHE_SIZE, BROWSER_CACHE_TTL
+
+_ROW = re.compile(r'<tr class="(dir|file)[^"]*"[^>]*>(.*?)</tr>', re.DOTALL | re.IGNORECASE)
+_LINK = re.compile(r'<a href="([^"]*)"[^>]*>(.*?)</a>', re.DOTALL | re.IGNORECASE)
+_TAGS = re.compile(r"<[^>]+>")
+
+PARENT_DIRECTORY = ".."
+
+
+@dataclass(frozen=True, slots=True)
+class DirectoryEntry:
+    """A folder or file listed by browser.html."""
+
+    name: str
+    path: str
+    is_dir: bool
+
+
+def parse_directory(page: str) -> list[DirectoryEntry]:
+    """Parse a browser.html page, folders first, without the parent folder."""
+    entries = []
+    for row_class, row in _ROW.findall(page):
+        link = _LINK.search(row)
+        if link is None:
+            continue
+        href, name = link.groups()
+        name = html.unescape(_TAGS.sub("", name)).strip()
+        paths = parse_qs(urlsplit(html.unescape(href)).query).get("path")
+        if not paths or name == PARENT_DIRECTORY:
+            continue
+        entries.append(DirectoryEntry(name, paths[0], row_class.lower() == "dir"))
+    entries.sort(key=lambda entry: not entry.is_dir)
+    return entries
+
+
+class DirectoryCache:
+    """LRU cache of directory listings expiring after a TTL."""
+
+    def __init__(self, max_size: int = BROWSER_CACHE_SIZE, ttl: float = BROWSER_CACHE_TTL.total_seconds()):
+        """Initialize an empty cache."""
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[str | None, tuple[float, list[DirectoryEntry]]] = OrderedDict()
+
+    def get(self, path: str | None) -> list[DirectoryEntry] | None:
+        """Return the cached listing of a folder, None if missing or expired."""
+        cached = self._entries.get(path)
+        if cached is None:
+            return None
+        if cached[0] < monotonic():
+            del self._entries[path]
+            return None
+        self._entries.move_to_end(path)
+        return cached[1]
+
+    def put(self, path: str | None, entries: list[DirectoryEntry]) -> None:
+        """Store the listing of a folder, evicting the least recently used ones."""
+        self._entries[path] = (monotonic() + self._ttl, entries)
+        self._entries.move_to_end(path)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every listing."""
+        self._entries.clear()
@@ -0,0 +1,248 @@
+"""Client for the MPC-HC web interface, shared by all entities of a config entry."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, asynccontextmanager, nullcontext
+
+import aiohttp
+from aiohttp import ClientTimeout, ServerTimeoutError, ClientConnectionError
+from aiohttp.web_exceptions import HTTPRequestTimeout
+from yarl import URL
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .breaker import CircuitBreaker
+from .browser import DirectoryCache, DirectoryEntry, parse_directory
+from .command_queue import CommandQueue, CommandStep
+from .parser import VariablesParser, parse_status
+from .recorder import TrafficRecorder
+from .state import PlayerState
+from .stats import ClientStats
+
+_LOGGER = logging.getLogger(__name__)
+
+# A sleeping PC is detected by the short connect timeout, a busy player gets more time to answer
+REQUEST_TIMEOUT = ClientTimeout(total=10, sock_connect=1, sock_read=3)
+# A single MPC-HC instance serves one poll and a handful of commands at a time
+CONNECTION_LIMIT = 4
+KEEPALIVE_TIMEOUT = 60
+
+TIMEOUT_ERRORS = (ServerTimeoutError, HTTPRequestTimeout, asyncio.TimeoutError)
+CONNECTION_ERRORS = (*TIMEOUT_ERRORS, ClientConnectionError)
+
+
+class MpcHcClient:
+    """HTTP client bound to one MPC-HC web interface.
+
+    The underlying session uses a small keep-alive connection pool which is
+    reused by the poller and by every command sent from the entities.
+    Commands go through a single ordered queue per host. A circuit breaker
+    rejects requests immediately while the host is unreachable.
+    State reads hold a slot of ``poll_slot`` (the fleet poller) during
+    their request only, not while waiting for the commands in flight.
+    """
+
+    def __init__(self, url: str, poll_slot: Callable[[], AbstractAsyncContextManager] | None = None):
+        """Initialize the client."""
+        self._url = url
+        self._poll_slot = poll_slot or nullcontext
+        self._session: aiohttp.ClientSession | None = None
+        self._command_url = URL(f"{url}/command.html")
+        self._command_urls: dict[CommandStep, URL] = {}
+        self._queue = CommandQueue(self._async_send_step)
+        self._breaker = CircuitBreaker()
+        self._directories = DirectoryCache()
+        self.stats = ClientStats()
+        # Opt-in, set by the start_recording service
+        self.recorder: TrafficRecorder | None = None
+
+    @property
+    def url(self) -> str:
+        """Return the base url of the web interface."""
+        return self._url
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of command sequences sent or waiting."""
+        return self._queue.pending
+
+    @property
+    def is_unreachable(self) -> bool:
+        """Return True while the circuit breaker is open."""
+        return self._breaker.is_open
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTION_LIMIT,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+        return self._session
+
+    async def async_get_variables(self) -> PlayerState:
+        """Fetch and parse variables.html, after the commands sent before."""
+        return await self._queue.async_read("variables", self._async_fetch_variables)
+
+    async def _async_fetch_variables(self) -> PlayerState:
+        parser = VariablesParser()
+        parse_time = 0.0
+        recorder = self.recorder
+        chunks = [] if recorder is not None else None
+        async with self._poll_slot(), self._async_guard("variables", f"Could not connect to MPC-HC at: {self._url}"):
+            async with self._get_session().get(f"{self._url}/variables.html") as response:
+                async for chunk in response.content.iter_any():
+                    self.stats.bytes_received += len(chunk)
+                    if chunks is not None:
+                        chunks.append(chunk)
+                    start = time.perf_counter()
+                    parser.feed(chunk)
+                    parse_time += time.perf_counter() - start
+        if recorder is not None:
+            recorder.record("variables", b"".join(chunks))
+        start = time.perf_counter()
+        state = PlayerState.from_variables(parser.result())
+        self.stats.add_parse((parse_time + time.perf_counter() - start) * 1000)
+
+        _LOGGER.debug("MPC data %s", state)
+        return state
+
+    async def async_get_status(self) -> dict[str, str] | None:
+        """Fetch the compact status.html after the commands sent before, None if the player doesn't serve it."""
+        return await self._queue.async_read("status", self._async_fetch_status)
+
+    async def _async_fetch_status(self) -> dict[str, str] | None:
+        async with self._poll_slot(), self._async_guard("status", f"Could not connect to MPC-HC at: {self._url}"):
+            async with self._get_session().get(f"{self._url}/status.html") as response:
+                if response.status != 200:
+                    return None
+                data = await response.read()
+        self.stats.bytes_received += len(data)
+        if self.recorder is not None:
+            self.recorder.record("status", data)
+        start = time.perf_counter()
+        status = parse_status(data)
+        self.stats.add_parse((time.perf_counter() - start) * 1000)
+        return status
+
+    async def async_get_directory(self, path: str | None) -> list[DirectoryEntry]:
+        """Return the listing of a folder (the browser start folder if None), cached for a while."""
+        entries = self._directories.get(path)
+        if entries is None:
+            params = {"path": path} if path else None
+            async with self._async_guard("browser", f"Could not browse {path or 'files'} on MPC-HC at: {self._url}"):
+                async with self._get_session().get(f"{self._url}/browser.html", params=params) as response:
+                    page = await response.text(encoding="utf-8")
+            self.stats.bytes_received += len(page)
+            entries = parse_directory(page)
+            self._directories.put(path, entries)
+        return entries
+
+    async def async_open_file(self, path: str) -> None:
+        """Open a file, as when clicking it in the web interface file browser."""
+        async with self._async_guard("browser", f"Could not open {path} on MPC-HC at: {self._url}"):
+            async with self._get_session().get(f"{self._url}/browser.html", params={"path": path}):
+                pass
+
+    async def async_get_snapshot(self) -> bytes | None:
+        """Fetch a JPEG snapshot of the current frame, None if nothing is playing."""
+        async with self._async_guard("snapshot", f"Could not get a snapshot from MPC-HC at: {self._url}"):
+            async with self._get_session().get(f"{self._url}/snapshot.jpg") as response:
+                if response.status != 200:
+                    return None
+                image = await response.read()
+        self.stats.bytes_received += len(image)
+        return image
+
+    async def async_send_command(self, command_id, **params) -> None:
+        """Send a command to MPC-HC via its window message ID."""
+        await self._queue.async_run([self.command_step(command_id, **params)])
+
+    async def async_send_commands(self, steps: list[CommandStep], delay_secs: float = 0) -> None:
+        """Send a sequence of commands, starting a step every delay_secs."""
+        await self._queue.async_run(steps, delay_secs)
+
+    async def async_send_scheduled(self, schedule) -> None:
+        """Send a precompiled sequence of batches with their start offsets (a macro)."""
+        await self._queue.async_run_scheduled(schedule)
+
+    async def async_seek(self, position: str) -> None:
+        """Seek to the given position (formatted as H:MM:SS)."""
+        await self._queue.async_run([self.command_step(-1, position=position)])
+
+    async def async_set_volume(self, volume: int) -> None:
+        """Set the absolute volume (0..100) in a single request."""
+        await self._queue.async_run([self.command_step(-2, volume=volume)])
+
+    @staticmethod
+    def command_step(command_id, **params) -> CommandStep:
+        """Build the step sending a command with optional parameters."""
+        return CommandStep(str(command_id), tuple((key, str(value)) for key, value in params.items()))
+
+    def _step_url(self, step: CommandStep) -> URL:
+        """Return the request url of a step, built once per command."""
+        url = self._command_urls.get(step)
+        if url is None:
+            url = self._command_url.with_query((("wm_command", step.command_id), *step.params))
+            # Positions and volumes are not worth caching, only plain commands are
+            if not step.params:
+                self._command_urls[step] = url
+        return url
+
+    async def _async_send_step(self, step: CommandStep) -> None:
+        url = self._step_url(step)
+        _LOGGER.debug("Send command %s", url)
+        if self.recorder is not None:
+            self.recorder.record("command", {"wm_command": step.command_id, **dict(step.params)})
+        async with self._async_guard("command", f"Could not send command {step.command_id} to MPC-HC at: {self._url}"):
+            async with self._get_session().post(url) if step.params else self._get_session().get(url):
+                pass
+
+    @asynccontextmanager
+    async def _async_guard(self, kind: str, message: str) -> AsyncIterator[None]:
+        """Run a request through the circuit breaker and the counters, raising MpcHcConnectionError on failure."""
+        if not self._breaker.allow():
+            self.stats.rejected += 1
+            if self.recorder is not None:
+                self.recorder.record("error", f"{kind}: rejected while unreachable")
+            raise MpcHcConnectionError(f"{message} (unreachable, request not sent)")
+        start = time.perf_counter()
+        try:
+            yield
+        except CONNECTION_ERRORS as ex:
+            if isinstance(ex, TIMEOUT_ERRORS):
+                self.stats.timeouts += 1
+            else:
+                self.stats.errors += 1
+            if self.recorder is not None:
+                self.recorder.record("error", f"{kind}: {ex!r}")
+            if self._breaker.failure():
+                _LOGGER.warning("MPC-HC at %s is unreachable, requests fail fast until it answers again", self._url)
+            raise MpcHcConnectionError(message) from ex
+        except BaseException:
+            self._breaker.release()
+            raise
+        self.stats.add_request(kind, (time.perf_counter() - start) * 1000)
+        if self._breaker.success():
+            _LOGGER.info("MPC-HC at %s is reachable again", self._url)
+
+    async def async_stop_recording(self) -> None:
+        """Stop the traffic recorder, flushing its file."""
+        recorder, self.recorder = self.recorder, None
+        if recorder is not None:
+            await asyncio.get_running_loop().run_in_executor(None, recorder.stop)
+
+    async def async_close(self) -> None:
+        """Close the session and release pooled connections."""
+        await self.async_stop_recording()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class MpcHcConnectionError(HomeAssistantError):
+    """Error to indicate the web interface could not be reached."""
@@ -0,0 +1,89 @@
+"""Playback clock extrapolating the MPC-HC position between polls."""
+from __future__ import annotations
+
+import datetime as dt
+
+from .state import PlayerState
+
+# The clock is re-anchored when a poll disagrees with the extrapolated position by more than this
+DRIFT_THRESHOLD_MS = 1000
+# MPC-HC doubles or halves the playback rate with the speed commands (auto speed step)
+SPEED_STEP = 2.0
+MIN_RATE = 0.125
+MAX_RATE = 16.0
+
+
+class PlaybackClock:
+    """Position model anchored on the last poll and extrapolated with the playback rate."""
+
+    __slots__ = ("position", "duration", "rate", "playing", "updated_at")
+
+    def __init__(self):
+        """Initialize an unanchored clock."""
+        self.position: float | None = None
+        self.duration: int | None = None
+        self.rate = 1.0
+        self.playing = False
+        self.updated_at: dt.datetime | None = None
+
+    def position_at(self, now: dt.datetime) -> float | None:
+        """Return the extrapolated position in ms."""
+        if self.position is None or self.updated_at is None:
+            return None
+        if not self.playing:
+            return self.position
+        position = self.position + (now - self.updated_at).total_seconds() * 1000 * self.rate
+        if self.duration:
+            position = min(position, self.duration)
+        return position
+
+    def sync(self, state: PlayerState, now: dt.datetime) -> bool:
+        """Correct the clock with a polled state, return True if it was re-anchored."""
+        position = state.position
+        if position is None:
+            return False
+        duration = state.duration
+        playing = state.playing
+        rate = state.rate if state.rate is not None else self.rate
+        changed = duration != self.duration
+        self.duration = duration
+        expected = self.position_at(now)
+        if (
+            expected is None
+            or playing != self.playing
+            or rate != self.rate
+            # The frontend extrapolates the published anchor at 1x : keep it fresh at any other rate
+            or (playing and rate != 1.0)
+            or abs(position - expected) > DRIFT_THRESHOLD_MS
+        ):
+            self.position = position
+            self.updated_at = now
+            self.rate = rate
+            self.playing = playing
+            return True
+        return changed
+
+    def set_playing(self, playing: bool, now: dt.datetime) -> None:
+        """Start or stop extrapolating from the current position."""
+        self.position = self.position_at(now)
+        self.updated_at = now
+        self.playing = playing
+
+    def seek(self, position: float, now: dt.datetime) -> None:
+        """Move the anchor to the given position in ms."""
+        self.position = position
+        self.updated_at = now
+
+    def set_rate(self, rate: float, now: dt.datetime) -> None:
+        """Apply a rate change immediately, before the next poll confirms it."""
+        self.position = self.position_at(now)
+        self.updated_at = now
+        self.rate = min(max(rate, MIN_RATE), MAX_RATE)
+
+    def reset(self) -> None:
+        """Forget the anchor, when the player is unreachable or closed."""
+        self.position = None
+        self.duration = None
+        self.rate = 1.0
+        self.playing = False
+        self.updated_at = None
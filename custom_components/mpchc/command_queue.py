@@ -0,0 +1,133 @@
+"""Ordered command queue of one MPC-HC web interface."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable, Sequence
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Any
+
+from .const import IDEMPOTENT_COMMANDS
+
+
+@dataclass(frozen=True, slots=True)
+class CommandStep:
+    """A single command.html request."""
+
+    command_id: str
+    params: tuple[tuple[str, str], ...] = ()
+
+
+def compile_steps(steps: Iterable[CommandStep], delay_secs: float) -> list[list[CommandStep]]:
+    """Group the steps of a sequence into batches sent together.
+
+    Without delay, consecutive duplicates of an idempotent command are sent
+    once and consecutive duplicates of any other command (e.g. 20 x VOLUME_UP)
+    don't depend on each other's order and are sent together over the pool.
+    With a delay every step keeps its own batch, so each one starts at its
+    offset in the sequence as requested.
+    """
+    batches = []
+    for step, run in groupby(steps):
+        count = sum(1 for _ in run)
+        if delay_secs > 0:
+            batches.extend([step] for _ in range(count))
+        elif step.command_id in IDEMPOTENT_COMMANDS:
+            batches.append([step])
+        else:
+            batches.append([step] * count)
+    return batches
+
+
+def schedule_steps(steps: Iterable[CommandStep], delay_secs: float) -> list[tuple[float, list[CommandStep]]]:
+    """Return the batches of a sequence with their start offset in seconds, one every delay_secs."""
+    return [(index * max(delay_secs, 0), batch) for index, batch in enumerate(compile_steps(steps, delay_secs))]
+
+
+class CommandQueue:
+    """Send command sequences in order, one sequence after the other.
+
+    Sequences from the media player and the remote share the queue so they
+    never interleave. Steps of a sequence are started every ``delay_secs``
+    from the beginning of the sequence, the delay is not added on top of the
+    round trip of each request.
+
+    State reads don't wait for the whole sequences : a read waits for the
+    requests in flight when it is queued, so it reflects the commands sent
+    before it, but neither for the delays between steps nor for the
+    sequences queued behind them. Commands never wait for reads. Concurrent
+    reads of the same page share a single request as long as no command was
+    sent meanwhile.
+    """
+
+    def __init__(self, send: Callable[[CommandStep], Awaitable[None]]):
+        """Initialize the queue with the coroutine sending one step."""
+        self._send = send
+        # Done once the last queued sequence is done
+        self._tail: asyncio.Future | None = None
+        self._in_flight: set[asyncio.Future] = set()
+        self._reads: dict[str, asyncio.Task] = {}
+        self.pending = 0
+
+    async def async_read(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fetch once the requests in flight are done, or join the same read already queued."""
+        read = self._reads.get(key)
+        if read is None:
+            read = self._reads[key] = asyncio.ensure_future(
+                self._async_ordered_read(key, fetch, tuple(self._in_flight))
+            )
+            # Don't log the error of a read whose callers were all cancelled
+            read.add_done_callback(lambda task: task.cancelled() or task.exception())
+        # A cancelled caller doesn't cancel the read shared with the others
+        return await asyncio.shield(read)
+
+    async def _async_ordered_read(
+            self, key: str, fetch: Callable[[], Awaitable[Any]], in_flight: tuple[asyncio.Future, ...]
+    ) -> Any:
+        try:
+            if in_flight:
+                await asyncio.wait(in_flight)
+            return await fetch()
+        finally:
+            if self._reads.get(key) is asyncio.current_task():
+                del self._reads[key]
+
+    async def async_run(self, steps: Iterable[CommandStep], delay_secs: float = 0) -> None:
+        """Send a sequence of steps once the previous sequences are done."""
+        await self.async_run_scheduled(schedule_steps(steps, delay_secs))
+
+    async def async_run_scheduled(self, schedule: Iterable[tuple[float, Sequence[CommandStep]]]) -> None:
+        """Send batches of steps at their offset from the start of the sequence, once the previous ones are done."""
+        loop = asyncio.get_running_loop()
+        previous, done = self._tail, loop.create_future()
+        self._tail = done
+        self.pending += 1
+        try:
+            if previous is not None and not previous.done():
+                await asyncio.wait((previous,))
+            start = loop.time()
+            for offset, batch in schedule:
+                if offset > 0:
+                    await asyncio.sleep(max(0.0, start + offset - loop.time()))
+                await self._async_send_batch(loop, batch)
+        finally:
+            self.pending -= 1
+            if previous is not None and not previous.done():
+                # Cancelled while waiting : the next sequences still wait for the previous one
+                previous.add_done_callback(lambda _: done.set_result(None))
+            else:
+                done.set_result(None)
+
+    async def _async_send_batch(self, loop: asyncio.AbstractEventLoop, batch: Sequence[CommandStep]) -> None:
+        sent = loop.create_future()
+        self._in_flight.add(sent)
+        # Reads queued from now on must reflect this batch
+        self._reads.clear()
+        try:
+            if len(batch) == 1:
+                await self._send(batch[0])
+            else:
+                await asyncio.gather(*(self._send(step) for step in batch))
+        finally:
+            self._in_flight.discard(sent)
+            sent.set_result(None)
@@ -0,0 +1,116 @@
+"""Command registry and remote macros compiled from the options."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .command_queue import CommandStep, compile_steps
+from .const import MACRO_MAX_WAIT, MPCHC_COMMANDS
+
+WAIT = "wait"
+
+
+class UnknownCommandError(ValueError):
+    """Error to indicate a command name which is not in the registry."""
+
+
+class MacroError(ValueError):
+    """Error to indicate an invalid macro definition."""
+
+
+class CommandRegistry:
+    """MPC-HC commands indexed by name and by id."""
+
+    def __init__(self, commands: dict[str, str]):
+        """Index the commands, the first name of an id is its name."""
+        self._ids = dict(commands)
+        self._names: dict[str, str] = {}
+        for name, command_id in commands.items():
+            self._names.setdefault(command_id, name)
+
+    def id(self, command: str) -> str:
+        """Return the id of a command name, numeric ids of commands not listed are accepted."""
+        command_id = self._ids.get(command)
+        if command_id is not None:
+            return command_id
+        if command.isdigit():
+            return command
+        raise UnknownCommandError(f"Unknown MPC-HC command: {command}")
+
+    def name(self, command_id: str) -> str | None:
+        """Return the name of a command id."""
+        return self._names.get(str(command_id))
+
+    def step(self, command: str) -> CommandStep:
+        """Return the step sending a command name or id."""
+        return CommandStep(self.id(command))
+
+
+COMMANDS = CommandRegistry(MPCHC_COMMANDS)
+
+
+@dataclass(frozen=True, slots=True)
+class Macro:
+    """A named command sequence, ready to send."""
+
+    name: str
+    steps: tuple[CommandStep, ...]
+    schedule: tuple[tuple[float, tuple[CommandStep, ...]], ...]
+
+
+def _compile_macro(name: str, definition: str, registry: CommandRegistry) -> Macro:
+    steps = []
+    schedule = []
+    segment: list[CommandStep] = []
+    offset = 0.0
+
+    def close_segment():
+        # Steps between two waits are sent back to back, repeated commands together
+        schedule.extend((offset, tuple(batch)) for batch in compile_steps(segment, 0))
+        segment.clear()
+
+    for token in (token.strip() for token in definition.split(",")):
+        if not token:
+            raise MacroError(f"{name}: empty step")
+        if token.split()[0].lower() == WAIT:
+            try:
+                delay = float(token[len(WAIT):])
+            except ValueError:
+                raise MacroError(f"{name}: invalid wait '{token}'") from None
+            if not 0 <= delay <= MACRO_MAX_WAIT:
+                raise MacroError(f"{name}: wait must be between 0 and {MACRO_MAX_WAIT} seconds")
+            close_segment()
+            offset += delay
+            continue
+        try:
+            step = registry.step(token)
+        except UnknownCommandError as ex:
+            raise MacroError(f"{name}: {ex}") from None
+        steps.append(step)
+        segment.append(step)
+    if not steps:
+        raise MacroError(f"{name}: no command")
+    if not segment:
+        raise MacroError(f"{name}: a wait must be followed by a command")
+    close_segment()
+    return Macro(name, tuple(steps), tuple(schedule))
+
+
+def compile_macros(text: str, registry: CommandRegistry = COMMANDS) -> dict[str, Macro]:
+    """Compile macro definitions, one "Name: COMMAND, wait SECONDS, COMMAND" per line.
+
+    Empty lines and lines starting with # are ignored. Raise MacroError on the
+    first invalid line.
+    """
+    macros: dict[str, Macro] = {}
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        name, separator, definition = line.partition(":")
+        name = name.strip()
+        if not separator or not name:
+            raise MacroError(f"Line {number}: expected 'Name: COMMAND, COMMAND'")
+        if name in macros:
+            raise MacroError(f"Line {number}: duplicate macro {name}")
+        macros[name] = _compile_macro(name, definition, registry)
+    return macros
@@ -1,20 +1,30 @@
 """ Config Flow for ZidoMedia Players. """
+import asyncio
+import ipaddress
 import logging
 
-import aiohttp
 import voluptuous as vol
 from aiohttp import ClientTimeout, ServerTimeoutError, ClientConnectionError
 from aiohttp.web_exceptions import HTTPRequestTimeout
 
 from homeassistant import config_entries, exceptions
+from homeassistant.components import network
 from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
-from .const import DEFAULT_NAME, DEFAULT_PORT, DOMAIN
+from homeassistant.core import callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
+from .commands import MacroError, compile_macros
+from .const import CONF_MACROS, DEFAULT_NAME, DEFAULT_PORT, DOMAIN
+from .discovery import async_discover, scan_hosts
 
 DATA_SCHEMA = vol.Schema({vol.Optional(CONF_NAME, default=DEFAULT_NAME, description="Name"): str,
     vol.Required(CONF_HOST, description="Host of MPC-HC"): str,
     vol.Optional(CONF_PORT, default=DEFAULT_PORT, description="Port"): int}
 )
 
+# Pick list entry leading to the manual host form
+MANUAL_ENTRY = "manual"
+
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -27,9 +37,10 @@ async def validate_input(hass, data):
         url = f"{data[CONF_HOST]}:{data[CONF_PORT]}"
         if not url.startswith('http://'):
             url = f'http://{url}'
-        async with aiohttp.ClientSession() as session:
-            response = await session.get(f"{url}/variables.html", timeout=ClientTimeout(3))
-    except (ServerTimeoutError, HTTPRequestTimeout, ClientConnectionError):
+        session = async_get_clientsession(hass)
+        async with session.get(f"{url}/variables.html", timeout=ClientTimeout(3)) as response:
+            pass
+    except (ServerTimeoutError, HTTPRequestTimeout, ClientConnectionError, asyncio.TimeoutError):
         raise CannotConnect
     except RuntimeError:
         raise UnknownError
@@ -56,9 +67,14 @@ class MPCHCFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self):
         """Initialize the Zidoo flow."""
         self.discovery_schema = None
+        self._discovered: dict[str, str] | None = None
 
     async def async_step_user(self, user_input=None):
         """Manage device specific parameters."""
+        if user_input is None and self._discovered is None:
+            self._discovered = await self._async_discover()
+            if self._discovered:
+                return await self.async_step_pick()
         errors = {}
         if user_input is not None:
             validated = None
@@ -71,15 +87,7 @@ class MPCHCFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                 errors["base"] = "unknown"
 
             if "base" not in errors:
-                unique_id = str(f"{DOMAIN}-{validated[CONF_HOST]}")
-                await self.async_set_unique_id(unique_id)
-                self._abort_if_unique_id_configured()
-                if not user_input[CONF_HOST].startswith('http://'):
-                    user_input[CONF_HOST] = f'http://{user_input[CONF_HOST]}'
-
-                return self.async_create_entry(
-                    title=DEFAULT_NAME, data=user_input
-                )
+                return await self._async_create_entry(validated)
 
         return self.async_show_form(
             step_id="user",
@@ -87,6 +95,55 @@ class MPCHCFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             errors=errors,
         )
 
+    async def async_step_pick(self, user_input=None):
+        """Let the user pick one of the players found on the network."""
+        if user_input is not None:
+            if user_input[CONF_HOST] == MANUAL_ENTRY:
+                return self.async_show_form(step_id="user", data_schema=self.discovery_schema or DATA_SCHEMA)
+            # The player already answered variables.html during the discovery
+            return await self._async_create_entry({**user_input, CONF_PORT: DEFAULT_PORT})
+
+        return self.async_show_form(
+            step_id="pick",
+            data_schema=vol.Schema({
+                vol.Optional(CONF_NAME, default=DEFAULT_NAME): str,
+                vol.Required(CONF_HOST): vol.In({**self._discovered, MANUAL_ENTRY: "Enter the host manually"}),
+            }),
+        )
+
+    async def _async_create_entry(self, user_input):
+        unique_id = str(f"{DOMAIN}-{user_input[CONF_HOST]}")
+        await self.async_set_unique_id(unique_id)
+        self._abort_if_unique_id_configured()
+        if not user_input[CONF_HOST].startswith('http://'):
+            user_input[CONF_HOST] = f'http://{user_input[CONF_HOST]}'
+
+        return self.async_create_entry(
+            title=DEFAULT_NAME, data=user_input
+        )
+
+    async def _async_discover(self) -> dict[str, str]:
+        """Scan the local networks, return the players not configured yet with their labels."""
+        interfaces = [
+            ipaddress.IPv4Interface(f"{address['address']}/{address['network_prefix']}")
+            for adapter in await network.async_get_adapters(self.hass)
+            if adapter["enabled"]
+            for address in adapter["ipv4"]
+        ]
+        players = await async_discover(async_get_clientsession(self.hass), scan_hosts(interfaces), DEFAULT_PORT)
+        configured = {entry.unique_id for entry in self._async_current_entries()}
+        return {
+            host: f"{host} ({variables['file']})" if variables.get("file") else host
+            for host, variables in sorted(players.items(), key=lambda item: ipaddress.IPv4Address(item[0]))
+            if f"{DOMAIN}-{host}" not in configured
+        }
+
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow defining the remote macros."""
+        return MPCHCOptionsFlowHandler()
+
     async def async_step_import(self, user_input):
         """Handle import."""
         _LOGGER.debug("Import user_info: %s", user_input)
@@ -94,6 +151,35 @@ class MPCHCFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
 
 
+class MPCHCOptionsFlowHandler(config_entries.OptionsFlow):
+    """Define the macros of the remote entity."""
+
+    async def async_step_init(self, user_input=None):
+        """Edit the macros, rejecting unknown commands before they are saved."""
+        errors = {}
+        placeholders = {"error": ""}
+        if user_input is not None:
+            try:
+                compile_macros(user_input.get(CONF_MACROS, ""))
+            except MacroError as ex:
+                errors[CONF_MACROS] = "invalid_macro"
+                placeholders["error"] = str(ex)
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        macros = user_input.get(CONF_MACROS, "") if user_input else self.config_entry.options.get(CONF_MACROS, "")
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema({
+                vol.Optional(CONF_MACROS, description={"suggested_value": macros}): TextSelector(
+                    TextSelectorConfig(multiline=True)
+                ),
+            }),
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+
 class CannotConnect(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
 
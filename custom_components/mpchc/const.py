@@ -1,6 +1,109 @@
+from datetime import timedelta
+
 DOMAIN="mpchc"
 DEFAULT_NAME = "MPC-HC"
 DEFAULT_PORT = 13579
+SCAN_INTERVAL = timedelta(seconds=10)
+# Adaptive polling : the position is extrapolated between polls while playing,
+# slow while paused/idle and backed off when the player answers without a state
+POLL_INTERVAL_PLAYING = timedelta(seconds=5)
+POLL_INTERVAL_IDLE = timedelta(seconds=20)
+POLL_INTERVAL_OFF = timedelta(seconds=60)
+# An unreachable player is polled often to notice it is back : the circuit breaker keeps
+# these polls off the network while it is open and its backoff spaces the probes
+POLL_INTERVAL_UNREACHABLE = timedelta(seconds=5)
+# Fast polling is kept for this duration after any command
+POLL_INTERVAL_BOOST = timedelta(seconds=2)
+POLL_BOOST_DURATION = timedelta(seconds=15)
+# Scheduling shared by all the players : jitter ratio applied to every polling
+# interval, maximum number of polls in flight and window of the aggregate poll rate
+DATA_FLEET = "fleet"
+FLEET_POLL_JITTER = 0.1
+FLEET_MAX_CONCURRENT_POLLS = 16
+FLEET_POLL_RATE_WINDOW = timedelta(seconds=60)
+# Polls read the compact status.html, the full variables.html is only fetched when
+# the file changes, after a command and at least once per VARIABLES_REFRESH_INTERVAL.
+# status.html reports the translated state string : the English ones are known,
+# others are learnt from the statestring of variables.html
+VARIABLES_REFRESH_INTERVAL = timedelta(seconds=60)
+STATUS_STATES = {"Stopped": 0, "Paused": 1, "Playing": 2}
+
+# Discovery : connections to the web interface port are attempted on every address of
+# the local networks (at most DISCOVERY_MAX_HOSTS per network) within DISCOVERY_TIMEOUT
+DISCOVERY_TIMEOUT = timedelta(seconds=3)
+DISCOVERY_CONNECT_TIMEOUT = timedelta(milliseconds=500)
+DISCOVERY_MAX_CONCURRENT_PROBES = 128
+DISCOVERY_MAX_HOSTS = 1024
+
+# Circuit breaker : opens after consecutive connection failures, then lets a probe
+# through after a backoff doubled on every failed probe
+BREAKER_THRESHOLD = 3
+BREAKER_BASE_BACKOFF = timedelta(seconds=2)
+BREAKER_MAX_BACKOFF = timedelta(seconds=30)
+
+# Media browsing : listings of browser.html are cached per player and split in pages
+BROWSER_CACHE_SIZE = 64
+BROWSER_CACHE_TTL = timedelta(seconds=60)
+BROWSER_PAGE_SIZE = 200
+MEDIA_TYPE_DIRECTORY = "directory"
+
+# Now playing snapshots : one snapshot per file and position bucket, fetched at most
+# once per interval, reduced to SNAPSHOT_MAX_WIDTH pixels when Pillow is available
+SNAPSHOT_CACHE_SIZE = 8
+SNAPSHOT_MIN_INTERVAL = timedelta(seconds=10)
+SNAPSHOT_POSITION_BUCKET = timedelta(seconds=60)
+SNAPSHOT_MAX_WIDTH = 640
+
+# Latest-wins delay applied to rapid volume changes from a slider, in seconds
+VOLUME_DEBOUNCE_COOLDOWN = 0.3
+# Latest-wins delay applied to rapid seeks from a progress slider, in seconds
+SEEK_DEBOUNCE_COOLDOWN = 0.3
+
+# Bus events fired from the polled state : changed fields, file changes and position
+# thresholds (ratio of the duration) reached, each threshold once per file
+EVENT_STATE_CHANGED = "mpchc_state_changed"
+EVENT_FILE_CHANGED = "mpchc_file_changed"
+EVENT_POSITION_REACHED = "mpchc_position_reached"
+POSITION_THRESHOLDS = (0.5, 0.9)
+
+# Traffic recorder (opt-in through a service) : rotating JSON lines file per player
+SERVICE_START_RECORDING = "start_recording"
+SERVICE_STOP_RECORDING = "stop_recording"
+RECORDER_MAX_BYTES = 5 * 1024 * 1024
+RECORDER_BACKUPS = 1
+
+# Remote macros defined in the options, one per line : "Name: COMMAND, wait 1.5, COMMAND"
+CONF_MACROS = "macros"
+MACRO_MAX_WAIT = 60
+
+# Broadcast service : commands are sent to every player at a shared deadline, this far
+# in the future by default, each request fired ahead by half its mean command latency
+SERVICE_BROADCAST = "broadcast"
+BROADCAST_DEFAULT_DELAY = timedelta(milliseconds=100)
+BROADCAST_MAX_DELAY = timedelta(seconds=10)
+
+# Resume index : last position of the most recent files per player, persisted at most
+# once per save delay. Positions near the start are not kept, files watched to the end are dropped
+SERVICE_RESUME = "resume"
+RESUME_STORAGE_VERSION = 1
+RESUME_MAX_FILES = 5000
+RESUME_SAVE_DELAY = timedelta(seconds=60)
+RESUME_MIN_POSITION = timedelta(seconds=10)
+RESUME_FINISHED_RATIO = 0.95
+# Time given to MPC-HC to open the file before seeking
+RESUME_OPEN_TIMEOUT = timedelta(seconds=10)
+RESUME_OPEN_POLL = timedelta(milliseconds=250)
+
+COMMAND_SEEK = "-1"
+COMMAND_VOLUME = "-2"
+COMMAND_PLAY = "887"
+COMMAND_PAUSE = "888"
+COMMAND_PLAY_PAUSE = "889"
+COMMAND_STOP = "890"
+COMMAND_MUTE = "909"
+COMMAND_SPEED_UP = "895"
+COMMAND_SPEED_DOWN = "894"
+COMMAND_SPEED_NORMAL = "896"
 
 MPCHC_COMMANDS = {
     "OPEN_FILE_QUICK": "969",
@@ -141,3 +244,26 @@ MPCHC_COMMANDS = {
     "VIEW_PIVOTE_CLOCKWISE": "882",
     "VIEW_PIVOTE_FLIP": "880",
 }
+
+# Commands leaving the player in the same state whether they are sent once or several times in a row
+IDEMPOTENT_COMMANDS = frozenset(MPCHC_COMMANDS[name] for name in (
+    "PLAY",
+    "PAUSE",
+    "STOP",
+    "CLOSE",
+    "EXIT",
+    "GOTO_START",
+    "SPEED_NORMAL",
+    "VIEW_MINIMAL",
+    "VIEW_COMPACT",
+    "VIEW_NORMAL",
+    "VIEW_ZOOM_50",
+    "VIEW_ZOOM_100",
+    "VIEW_ZOOM_200",
+    "VIEW_RESET",
+    "VOLUME_GAIN_OFF",
+    "VOLUME_GAIN_MAX",
+    "COLORS_RESET",
+    "SUBTITLES_RELOAD",
+    "SUBTITLES_RESETPOS",
+))
@@ -0,0 +1,347 @@
+"""Polling coordinator shared by the MPC-HC entities of a config entry."""
+from __future__ import annotations
+
+import asyncio
+import copy
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import replace
+from datetime import timedelta
+from math import inf
+from time import monotonic
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+import homeassistant.util.dt as dt_util
+
+from .client import MpcHcClient, MpcHcConnectionError
+from .events import PlayerEvents
+from .clock import PlaybackClock, SPEED_STEP
+from .fleet import FleetPoller
+from .resume import ResumeIndex, file_key
+from .state import PlaybackState, PlayerState, StatusMerger
+from .const import (
+    DOMAIN,
+    SCAN_INTERVAL,
+    POLL_INTERVAL_PLAYING,
+    POLL_INTERVAL_IDLE,
+    POLL_INTERVAL_OFF,
+    POLL_INTERVAL_UNREACHABLE,
+    POLL_INTERVAL_BOOST,
+    POLL_BOOST_DURATION,
+    SEEK_DEBOUNCE_COOLDOWN,
+    VOLUME_DEBOUNCE_COOLDOWN,
+    RESUME_OPEN_TIMEOUT,
+    RESUME_OPEN_POLL,
+    VARIABLES_REFRESH_INTERVAL,
+    COMMAND_SEEK,
+    COMMAND_VOLUME,
+    COMMAND_PLAY,
+    COMMAND_PAUSE,
+    COMMAND_PLAY_PAUSE,
+    COMMAND_STOP,
+    COMMAND_MUTE,
+    COMMAND_SPEED_UP,
+    COMMAND_SPEED_DOWN,
+    COMMAND_SPEED_NORMAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MpcHcCoordinator(DataUpdateCoordinator[PlayerState]):
+    """Poll variables.html once for the media player and the remote.
+
+    The polling interval follows the playback state : fast while playing,
+    slow while paused or idle and backed off while the player reports no
+    state. An unreachable player is polled often, the circuit breaker keeps
+    these polls off the network.
+    Any command switches back to fast polling for a short while.
+    Between polls the position is extrapolated by the playback clock.
+    Routine polls only read status.html and update the matching variables,
+    variables.html is read again when the file changes, after a command and
+    on a slow cadence for the other variables (playback rate, size...).
+
+    Commands apply their expected result immediately as an optimistic overlay
+    on the polled variables. The first poll started after the command was
+    sent replaces the overlay, which rolls it back if the player disagrees.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, client: MpcHcClient, fleet: FleetPoller):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            config_entry=config_entry,
+            name=f"{DOMAIN} {client.url}",
+            update_interval=SCAN_INTERVAL,
+            # Don't notify the entities when the player reports the same state
+            always_update=False,
+        )
+        self.client = client
+        self.fleet = fleet
+        self.clock = PlaybackClock()
+        self.events = PlayerEvents(hass, self)
+        self.resume = ResumeIndex(hass, config_entry)
+        self._boost_until = 0.0
+        self._optimistic: dict[str, Any] = {}
+        self._optimistic_since = 0.0
+        self._clock_backup: PlaybackClock | None = None
+        self._status_supported = True
+        self._status_merger = StatusMerger()
+        self._variables_due = 0.0
+        self._phased = False
+        # Scrubbing fires many seeks : only the first and the latest target are sent
+        self._seek = _LatestWins(hass, self, SEEK_DEBOUNCE_COOLDOWN, self._async_send_seek)
+        # A slider fires many volume changes : only the first and the latest are sent
+        self._volume = _LatestWins(hass, self, VOLUME_DEBOUNCE_COOLDOWN, self.client.async_set_volume)
+
+    @property
+    def player_state(self) -> PlayerState | None:
+        """Return the state of the last successful poll with the optimistic overlay."""
+        if not self.last_update_success or self.data is None:
+            return None
+        if self._optimistic:
+            return replace(self.data, **self._optimistic)
+        return self.data
+
+    async def _async_update_data(self) -> PlayerState:
+        """Fetch the player state."""
+        _LOGGER.debug("MPC update : %s", self.client.url)
+        started = monotonic()
+        try:
+            data = await self._async_fetch()
+        except MpcHcConnectionError as ex:
+            self.clock.reset()
+            self._clear_optimistic()
+            self._status_merger.reset()
+            self._variables_due = 0.0
+            self.update_interval = self._next_interval(None)
+            self.events.async_update(None)
+            raise UpdateFailed(str(ex)) from ex
+        self.update_interval = self._next_interval(data)
+        changed = self._reconcile(data, started)
+        # A poll started before the command was sent doesn't reflect it yet
+        if self._clock_backup is None:
+            changed |= self.clock.sync(data, dt_util.utcnow())
+        self.events.async_update(data)
+        self.resume.async_update(data)
+        # An identical state won't notify the entities, a rollback or drift correction still must be shown
+        if changed and data == self.data:
+            self.async_update_listeners()
+        return data
+
+    async def _async_fetch(self) -> PlayerState:
+        """Read status.html if enough, variables.html otherwise."""
+        if self._status_supported and self.data is not None and monotonic() < self._variables_due:
+            status = await self.client.async_get_status()
+            if status is None:
+                _LOGGER.debug("MPC at %s doesn't serve status.html, polling variables.html", self.client.url)
+                self._status_supported = False
+            elif (data := self._status_merger.merge(self.data, status)) is not None:
+                return data
+        data = await self.client.async_get_variables()
+        self._variables_due = monotonic() + VARIABLES_REFRESH_INTERVAL.total_seconds()
+        self._status_merger.learn(data)
+        return data
+
+    def _reconcile(self, data: PlayerState, started: float) -> bool:
+        """Drop the optimistic overlay once a poll started after the command, return True if dropped."""
+        if self._clock_backup is None or started < self._optimistic_since:
+            return False
+        rejected = {key: getattr(data, key) for key, value in self._optimistic.items() if getattr(data, key) != value}
+        if rejected:
+            _LOGGER.debug("MPC optimistic state %s rolled back to %s", self._optimistic, rejected)
+        self._clear_optimistic()
+        return True
+
+    def _clear_optimistic(self) -> None:
+        self._optimistic = {}
+        self._clock_backup = None
+
+    def _next_interval(self, data: PlayerState | None) -> timedelta:
+        """Return the jittered polling interval matching the playback state."""
+        if monotonic() < self._boost_until:
+            interval = POLL_INTERVAL_BOOST
+        elif data is None:
+            interval = POLL_INTERVAL_UNREACHABLE
+        elif data.state is None:
+            interval = POLL_INTERVAL_OFF
+        elif data.playing:
+            interval = POLL_INTERVAL_PLAYING
+        else:
+            interval = POLL_INTERVAL_IDLE
+        if not self._phased:
+            # The first polls of the players all run at setup : start each one at a random phase
+            self._phased = True
+            return self.fleet.phased(interval)
+        return self.fleet.jittered(interval)
+
+    @callback
+    def async_apply_command(self, command_id, **params) -> None:
+        """Reflect the expected effect of a command before the next poll confirms it."""
+        command_id = str(command_id)
+        now = dt_util.utcnow()
+        player_state = self.player_state
+        if player_state is None:
+            return
+        backup = copy.copy(self.clock)
+        expected = {}
+        if command_id == COMMAND_PLAY or (command_id == COMMAND_PLAY_PAUSE and not player_state.playing):
+            expected["state"] = PlaybackState.PLAYING
+            self.clock.set_playing(True, now)
+        elif command_id in (COMMAND_PAUSE, COMMAND_PLAY_PAUSE):
+            expected["state"] = PlaybackState.PAUSED
+            self.clock.set_playing(False, now)
+        elif command_id == COMMAND_STOP:
+            expected["state"] = PlaybackState.STOPPED
+            self.clock.set_playing(False, now)
+            self.clock.seek(0, now)
+        elif command_id == COMMAND_MUTE:
+            expected["muted"] = not player_state.muted
+        elif command_id == COMMAND_VOLUME:
+            expected["volume"] = params["volume"]
+        elif command_id == COMMAND_SEEK:
+            self.clock.seek(params["position"] * 1000, now)
+        elif command_id == COMMAND_SPEED_UP:
+            self.clock.set_rate(self.clock.rate * SPEED_STEP, now)
+        elif command_id == COMMAND_SPEED_DOWN:
+            self.clock.set_rate(self.clock.rate / SPEED_STEP, now)
+        elif command_id == COMMAND_SPEED_NORMAL:
+            self.clock.set_rate(1.0, now)
+        else:
+            return
+        if self._clock_backup is None:
+            self._clock_backup = backup
+        self._optimistic.update(expected)
+        # The command may wait behind a sequence or a debouncer : only the polls started once it is sent reconcile it
+        self._optimistic_since = inf
+        self.async_update_listeners()
+
+    @callback
+    def async_rollback(self) -> None:
+        """Drop the optimistic state after a command could not be sent."""
+        if self._clock_backup is not None:
+            self.clock = self._clock_backup
+        self._clear_optimistic()
+        self.async_update_listeners()
+
+    @callback
+    def async_command_sent(self) -> None:
+        """Switch to fast polling, the next poll reconciles the optimistic state."""
+        self._boost_until = monotonic() + POLL_BOOST_DURATION.total_seconds()
+        self._optimistic_since = monotonic()
+        # status.html doesn't report every variable a command may change (playback rate)
+        self._variables_due = 0.0
+        self.update_interval = POLL_INTERVAL_BOOST
+        self._schedule_refresh()
+
+    async def async_seek(self, position: float) -> None:
+        """Seek to a position in seconds, coalescing rapid seeks of the player."""
+        self.async_apply_command(COMMAND_SEEK, position=position)
+        await self._seek.async_call(position)
+
+    async def _async_send_seek(self, position: float) -> None:
+        await self.client.async_seek(str(timedelta(seconds=position)))
+
+    async def async_set_volume(self, volume: int) -> None:
+        """Set the absolute volume (0..100), coalescing rapid changes of the player."""
+        self.async_apply_command(COMMAND_VOLUME, volume=volume)
+        await self._volume.async_call(volume)
+
+    async def async_resume(self, path: str, position: float | None = None) -> float | None:
+        """Open a file and seek to a position in seconds (its saved position if None), return the position."""
+        if position is None:
+            position = self.resume.position(path)
+        try:
+            await self.client.async_open_file(path)
+            if position:
+                # A seek sent before the file is open would apply to the previous file
+                await self._async_wait_open(path)
+                self.async_apply_command(COMMAND_SEEK, position=position)
+                await self.client.async_seek(str(timedelta(seconds=position)))
+        except MpcHcConnectionError:
+            self.async_rollback()
+            raise
+        finally:
+            self.async_command_sent()
+        return position
+
+    async def _async_wait_open(self, path: str) -> None:
+        """Wait until the player reports the file with its duration."""
+        key = file_key(path)
+        try:
+            async with asyncio.timeout(RESUME_OPEN_TIMEOUT.total_seconds()):
+                while True:
+                    data = await self.client.async_get_variables()
+                    if data.filepath and file_key(data.filepath) == key and data.duration:
+                        return
+                    await asyncio.sleep(RESUME_OPEN_POLL.total_seconds())
+        except TimeoutError:
+            raise MpcHcConnectionError(f"MPC-HC at {self.client.url} did not open {path}") from None
+
+    async def async_shutdown(self) -> None:
+        """Stop polling, save the resume index and close the connection pool."""
+        self._seek.async_shutdown()
+        self._volume.async_shutdown()
+        self.events.async_cancel()
+        await super().async_shutdown()
+        await self.resume.async_flush()
+        await self.client.async_close()
+
+
+class _LatestWins:
+    """Send the latest of rapidly requested values (seek, volume) of a player.
+
+    The first request is sent at once, the later ones are coalesced by a
+    debouncer and only their latest value is sent, superseding the values
+    not sent yet.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: MpcHcCoordinator,
+        cooldown: float,
+        send: Callable[[Any], Awaitable[None]],
+    ):
+        """Initialize the sender of one command."""
+        self._coordinator = coordinator
+        self._send = send
+        self._pending: Any = None
+        self._debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=cooldown,
+            immediate=True,
+            function=self._async_send,
+        )
+
+    async def async_call(self, value: Any) -> None:
+        """Request a value to be sent."""
+        self._pending = value
+        await self._debouncer.async_call()
+
+    async def _async_send(self) -> None:
+        if self._pending is None:
+            return
+        # The debouncer drops the calls made while a value is in flight : send their latest value after it
+        while self._pending is not None:
+            value, self._pending = self._pending, None
+            try:
+                await self._send(value)
+            except MpcHcConnectionError as ex:
+                _LOGGER.error(ex)
+                self._pending = None
+                self._coordinator.async_rollback()
+                return
+        # Every value re-arms the same refresh timer : a single poll reconciles them
+        self._coordinator.async_command_sent()
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel the pending cooldown."""
+        self._debouncer.async_shutdown()
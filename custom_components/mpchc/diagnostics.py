@@ -0,0 +1,34 @@
+"""Diagnostics support for MPC-HC."""
+from __future__ import annotations
+
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .coordinator import MpcHcCoordinator
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, config_entry: ConfigEntry) -> dict[str, Any]:
+    """Return the performance counters of the player for the diagnostics download."""
+    coordinator: MpcHcCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    client = coordinator.client
+    return {
+        "entry": dict(config_entry.data),
+        "url": client.url,
+        "unreachable": client.is_unreachable,
+        "player": asdict(coordinator.data) if coordinator.data is not None else None,
+        "command_queue_depth": client.queue_depth,
+        "resume_files": len(coordinator.resume),
+        "poll": {
+            "interval_s": coordinator.update_interval.total_seconds() if coordinator.update_interval else None,
+            "last_update_success": coordinator.last_update_success,
+        },
+        "client": client.stats.as_dict(),
+        "fleet": {
+            "polls_per_s": round(coordinator.fleet.poll_rate, 3),
+            "in_flight": coordinator.fleet.in_flight,
+        },
+    }
@@ -0,0 +1,90 @@
+"""Discovery of MPC-HC web interfaces on the local networks."""
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import logging
+from collections.abc import Iterable
+
+from aiohttp import ClientError, ClientSession, ClientTimeout
+
+from .const import (
+    DISCOVERY_CONNECT_TIMEOUT,
+    DISCOVERY_MAX_CONCURRENT_PROBES,
+    DISCOVERY_MAX_HOSTS,
+    DISCOVERY_TIMEOUT,
+)
+from .parser import parse_variables
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def scan_hosts(networks: Iterable[ipaddress.IPv4Interface]) -> list[str]:
+    """Return the addresses to probe on the networks of the local interfaces.
+
+    Networks larger than DISCOVERY_MAX_HOSTS are narrowed around the local
+    address, loopback and link-local networks are skipped.
+    """
+    hosts: dict[str, None] = {}
+    for interface in networks:
+        if interface.is_loopback or interface.is_link_local:
+            continue
+        network = interface.network
+        if network.num_addresses > DISCOVERY_MAX_HOSTS:
+            prefix = 32 - (DISCOVERY_MAX_HOSTS.bit_length() - 1)
+            network = ipaddress.IPv4Interface(f"{interface.ip}/{prefix}").network
+        for host in network.hosts():
+            if host != interface.ip:
+                hosts[str(host)] = None
+    return list(hosts)
+
+
+async def _async_probe(host: str, port: int, semaphore: asyncio.Semaphore) -> str | None:
+    """Return the host if its port accepts connections."""
+    async with semaphore:
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), DISCOVERY_CONNECT_TIMEOUT.total_seconds()
+            )
+        except (OSError, asyncio.TimeoutError):
+            return None
+    writer.close()
+    return host
+
+
+async def _async_verify(session: ClientSession, host: str, port: int, timeout: float) -> dict[str, str] | None:
+    """Return the variables of the host if it is an MPC-HC web interface."""
+    try:
+        async with session.get(f"http://{host}:{port}/variables.html", timeout=ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                return None
+            variables = parse_variables(await response.read())
+    except (ClientError, asyncio.TimeoutError):
+        return None
+    # Any web server may listen on the port : MPC-HC always reports its version
+    return variables if "version" in variables else None
+
+
+async def async_discover(
+        session: ClientSession, hosts: Iterable[str], port: int
+) -> dict[str, dict[str, str]]:
+    """Probe the port on every host and return the variables of the MPC-HC players found.
+
+    Connections are attempted concurrently and the responders verified within
+    DISCOVERY_TIMEOUT overall, hosts which did not answer in time are ignored.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + DISCOVERY_TIMEOUT.total_seconds()
+    semaphore = asyncio.Semaphore(DISCOVERY_MAX_CONCURRENT_PROBES)
+    probes = [asyncio.ensure_future(_async_probe(host, port, semaphore)) for host in hosts]
+    if not probes:
+        return {}
+    done, pending = await asyncio.wait(probes, timeout=deadline - loop.time())
+    for probe in pending:
+        probe.cancel()
+    responders = [probe.result() for probe in done if probe.result() is not None]
+    _LOGGER.debug("MPC-HC discovery : %d of %d hosts listen on port %d", len(responders), len(probes), port)
+    # A responder found at the deadline still gets a chance to answer
+    timeout = max(deadline - loop.time(), DISCOVERY_CONNECT_TIMEOUT.total_seconds())
+    results = await asyncio.gather(*(_async_verify(session, host, port, timeout) for host in responders))
+    return {host: variables for host, variables in zip(responders, results) if variables is not None}
@@ -0,0 +1,115 @@
+"""Bus events fired when the polled state of an MPC-HC player changes."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.const import CONF_NAME
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+import homeassistant.util.dt as dt_util
+
+from .const import EVENT_FILE_CHANGED, EVENT_POSITION_REACHED, EVENT_STATE_CHANGED, POSITION_THRESHOLDS
+from .state import PlayerState, StateChanges
+
+if TYPE_CHECKING:
+    from .coordinator import MpcHcCoordinator
+
+
+class PlayerEvents:
+    """Fire the events of one player from its successive polled states.
+
+    Listeners only receive the fields which changed, the availability being
+    one of them. While the player is unreachable no other event is fired,
+    the next poll is compared with the state before the outage. Instead of checking the
+    position on every poll, a timer is set at the time the next threshold is
+    due according to the playback clock, and moved whenever a poll changes
+    the playback.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator: MpcHcCoordinator):
+        """Initialize the events of a player."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._changes = StateChanges()
+        self._reached: set[float] = set()
+        self._cancel_timer: Callable[[], None] | None = None
+
+    @property
+    def _event_base(self) -> dict[str, Any]:
+        return {
+            "entry_id": self._coordinator.config_entry.entry_id,
+            "name": self._coordinator.config_entry.data[CONF_NAME],
+            "url": self._coordinator.client.url,
+        }
+
+    @callback
+    def async_update(self, state: PlayerState | None) -> None:
+        """Compare a polled state (None if unreachable) with the last reachable one."""
+        previous = self._changes.state
+        changes = self._changes.update(state)
+        if changes:
+            self._hass.bus.async_fire(EVENT_STATE_CHANGED, {**self._event_base, "changes": changes})
+        if state is None:
+            self.async_cancel()
+            return
+        if previous is None:
+            # Thresholds passed before the first poll were not reached now
+            self._skip_passed_thresholds()
+        elif "filepath" in changes:
+            self._hass.bus.async_fire(EVENT_FILE_CHANGED, {
+                **self._event_base,
+                "file": state.file,
+                "filepath": state.filepath,
+                "previous_filepath": previous.filepath,
+            })
+            # Neither were the thresholds passed when the file was opened (resumed)
+            self._reached.clear()
+            self._skip_passed_thresholds()
+        self._schedule()
+
+    def _skip_passed_thresholds(self) -> None:
+        clock = self._coordinator.clock
+        position = clock.position_at(dt_util.utcnow())
+        if position is None or not clock.duration:
+            return
+        self._reached.update(threshold for threshold in POSITION_THRESHOLDS if position >= threshold * clock.duration)
+
+    def _schedule(self) -> None:
+        """Fire the thresholds reached and set a timer at the next one."""
+        self.async_cancel()
+        clock = self._coordinator.clock
+        state = self._changes.state
+        if not self._changes.available or not state.playing or not clock.duration:
+            return
+        position = clock.position_at(dt_util.utcnow())
+        if position is None:
+            return
+        for threshold in sorted(POSITION_THRESHOLDS):
+            if threshold in self._reached:
+                continue
+            target = threshold * clock.duration
+            # The timer may fire a hair early compared to the extrapolated clock
+            if position >= target - 1:
+                self._reached.add(threshold)
+                self._hass.bus.async_fire(EVENT_POSITION_REACHED, {
+                    **self._event_base,
+                    "file": state.file,
+                    "threshold": threshold,
+                    "position": round(position / 1000, 3),
+                })
+                continue
+            self._cancel_timer = async_call_later(self._hass, (target - position) / clock.rate / 1000, self._async_timer)
+            return
+
+    @callback
+    def _async_timer(self, _now) -> None:
+        self._cancel_timer = None
+        self._schedule()
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the pending threshold timer."""
+        if self._cancel_timer is not None:
+            self._cancel_timer()
+            self._cancel_timer = None
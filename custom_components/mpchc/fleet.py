@@ -0,0 +1,63 @@
+"""Poll scheduling shared by all the MPC-HC players of a Home Assistant instance."""
+from __future__ import annotations
+
+import asyncio
+import random
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from time import monotonic
+
+from .const import FLEET_MAX_CONCURRENT_POLLS, FLEET_POLL_JITTER, FLEET_POLL_RATE_WINDOW
+
+
+class FleetPoller:
+    """Spread the polls of every config entry and cap the requests in flight.
+
+    The first interval of each coordinator is a random phase inside the
+    interval, so players set up at the same time are spread over it, and the
+    next ones are drawn with some jitter so they don't fall back in step,
+    and waits for a free slot before each poll request (not while the request
+    waits for the commands in flight).
+    """
+
+    def __init__(self, max_concurrent: int = FLEET_MAX_CONCURRENT_POLLS, jitter: float = FLEET_POLL_JITTER):
+        """Initialize the fleet poller."""
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._jitter = jitter
+        self._polls: deque[float] = deque()
+        self.in_flight = 0
+
+    def phased(self, interval: timedelta) -> timedelta:
+        """Return a random delay spanning a whole interval, to spread the first polls."""
+        return interval * random.uniform(self._jitter, 1 + self._jitter)
+
+    def jittered(self, interval: timedelta) -> timedelta:
+        """Return the interval randomly stretched or shortened by the jitter ratio."""
+        return interval * random.uniform(1 - self._jitter, 1 + self._jitter)
+
+    @asynccontextmanager
+    async def async_poll(self) -> AsyncIterator[None]:
+        """Wait for a free slot and hold it during one poll request."""
+        async with self._semaphore:
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+                now = monotonic()
+                self._polls.append(now)
+                self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        """Forget the polls older than the window."""
+        horizon = now - FLEET_POLL_RATE_WINDOW.total_seconds()
+        while self._polls and self._polls[0] < horizon:
+            self._polls.popleft()
+
+    @property
+    def poll_rate(self) -> float:
+        """Return the aggregate number of polls per second over the last window."""
+        self._trim(monotonic())
+        return len(self._polls) / FLEET_POLL_RATE_WINDOW.total_seconds()
@@ -1,20 +1,28 @@
 """Support to interface with the MPC-HC Web API."""
 import datetime
 import datetime as dt
+import hashlib
 import logging
-import re
+import math
+from typing import Any
 
-import aiohttp
 import voluptuous as vol
-from aiohttp import ClientTimeout, ServerTimeoutError, ClientConnectionError
-from aiohttp.web_exceptions import HTTPRequestTimeout
 
 from homeassistant.components.media_player import PLATFORM_SCHEMA, MediaPlayerEntity, MediaType, MediaPlayerState, \
-    ENTITY_ID_FORMAT
+    ENTITY_ID_FORMAT, BrowseMedia
 from homeassistant.components.media_player.const import (
+    ATTR_MEDIA_DURATION,
+    ATTR_MEDIA_EXTRA,
+    ATTR_MEDIA_POSITION,
+    ATTR_MEDIA_POSITION_UPDATED_AT,
+    ATTR_MEDIA_TITLE,
+    ATTR_MEDIA_VOLUME_LEVEL,
+    ATTR_MEDIA_VOLUME_MUTED,
+    MediaClass,
     MediaPlayerEntityFeature,
     MediaType
 )
+from homeassistant.components.media_player.errors import BrowseError
 from homeassistant.config_entries import ConfigEntry, SOURCE_IMPORT
 from homeassistant.const import (
     CONF_HOST,
@@ -22,12 +30,28 @@ from homeassistant.const import (
     CONF_PORT,
 )
 import homeassistant.helpers.config_validation as cv
+from homeassistant.core import HomeAssistant, State, callback
 import homeassistant.util.dt as dt_util
-from homeassistant.core import HomeAssistant
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-
-from .const import DEFAULT_NAME, DEFAULT_PORT, DOMAIN
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .browser import DirectoryEntry
+from .client import MpcHcConnectionError
+from .const import (
+    DEFAULT_NAME,
+    DEFAULT_PORT,
+    DOMAIN,
+    BROWSER_PAGE_SIZE,
+    MEDIA_TYPE_DIRECTORY,
+    SNAPSHOT_MAX_WIDTH,
+    SNAPSHOT_POSITION_BUCKET,
+    COMMAND_MUTE,
+)
+from .coordinator import MpcHcCoordinator
+from .snapshot import SnapshotCache, downscale
+from .state import PlaybackState, PlayerState
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -37,13 +61,19 @@ SUPPORT_MPCHC = (
         | MediaPlayerEntityFeature.PAUSE
         | MediaPlayerEntityFeature.PREVIOUS_TRACK
         | MediaPlayerEntityFeature.VOLUME_STEP
+        | MediaPlayerEntityFeature.VOLUME_SET
         | MediaPlayerEntityFeature.VOLUME_MUTE
         | MediaPlayerEntityFeature.PLAY
         | MediaPlayerEntityFeature.STOP
         | MediaPlayerEntityFeature.SEEK
-    #| MediaPlayerEntityFeature.BROWSE_MEDIA TODO
+        | MediaPlayerEntityFeature.BROWSE_MEDIA
+        | MediaPlayerEntityFeature.PLAY_MEDIA
 )
 
+AUDIO_EXTENSIONS = {"mp3", "flac", "wav", "aac", "ogg", "opus", "m4a", "wma", "ac3", "dts"}
+# Separates the folder path from the page number in the browsed media ids (not allowed in Windows paths)
+PAGE_SEPARATOR = "|"
+
 PLATFORM_SCHEMA = PLATFORM_SCHEMA.extend(
     {
         vol.Required(CONF_HOST): cv.string,
@@ -69,28 +99,79 @@ async def async_setup_entry(
         async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Add Media Player from a config entry."""
-    async_add_entities([MpcHcDevice(config_entry)])
+    coordinator: MpcHcCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities([MpcHcDevice(coordinator, config_entry)])
+
+
+def _entry_media(entry: DirectoryEntry) -> BrowseMedia:
+    """Return the browse item of a folder or file."""
+    if entry.is_dir:
+        return BrowseMedia(
+            media_class=MediaClass.DIRECTORY,
+            media_content_id=entry.path,
+            media_content_type=MEDIA_TYPE_DIRECTORY,
+            title=entry.name,
+            can_play=False,
+            can_expand=True,
+        )
+    audio = entry.name.rsplit(".", 1)[-1].lower() in AUDIO_EXTENSIONS
+    return BrowseMedia(
+        media_class=MediaClass.MUSIC if audio else MediaClass.VIDEO,
+        media_content_id=entry.path,
+        media_content_type=MediaType.MUSIC if audio else MediaType.VIDEO,
+        title=entry.name,
+        can_play=True,
+        can_expand=False,
+    )
+
+
+def _directory_media(path: str, title: str, entries: list[DirectoryEntry], page: int) -> BrowseMedia:
+    """Return the browse item of one page of a folder, with a link to the next page."""
+    pages = max(1, math.ceil(len(entries) / BROWSER_PAGE_SIZE))
+    children = [_entry_media(entry) for entry in entries[page * BROWSER_PAGE_SIZE:(page + 1) * BROWSER_PAGE_SIZE]]
+    if page + 1 < pages:
+        children.append(BrowseMedia(
+            media_class=MediaClass.DIRECTORY,
+            media_content_id=f"{path}{PAGE_SEPARATOR}{page + 1}",
+            media_content_type=MEDIA_TYPE_DIRECTORY,
+            title=f"Next page ({page + 2}/{pages})",
+            can_play=False,
+            can_expand=True,
+        ))
+    return BrowseMedia(
+        media_class=MediaClass.DIRECTORY,
+        media_content_id=f"{path}{PAGE_SEPARATOR}{page}" if page else path,
+        media_content_type=MEDIA_TYPE_DIRECTORY,
+        title=f"{title} ({page + 1}/{pages})" if pages > 1 else title,
+        can_play=False,
+        can_expand=True,
+        children=children,
+    )
 
 
-class MpcHcDevice(MediaPlayerEntity):
+class MpcHcDevice(CoordinatorEntity[MpcHcCoordinator], MediaPlayerEntity, RestoreEntity):
     """Representation of a MPC-HC server."""
 
-    def __init__(self, config_entry: ConfigEntry):
+    def __init__(self, coordinator: MpcHcCoordinator, config_entry: ConfigEntry):
         """Initialize the MPC-HC device."""
+        super().__init__(coordinator)
         self._name = config_entry.data[CONF_NAME]
-        self._url = f'{config_entry.data[CONF_HOST]}:{config_entry.data[CONF_PORT]}'
-        self._player_variables = {}
-        self._available = False
+        self._url = coordinator.client.url
         self._media_duration = None
         self._media_position = None
         self._media_last_updated = None
         self._media_type = MediaType.VIDEO
         self._media_title = None
         self._media_state = MediaPlayerState.OFF
-        self._session = aiohttp.ClientSession()
+        self._fingerprint = None
+        self._snapshots = SnapshotCache()
+        # Last known state shown until the first poll after a restart
+        self._stale = False
+        self._restored_state: PlayerState | None = None
         entity_name = self._url.lstrip('http://')
         self._unique_id = ENTITY_ID_FORMAT.format(
             f"{entity_name}_media_player")
+        self._update_from_state()
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -109,58 +190,104 @@ class MpcHcDevice(MediaPlayerEntity):
     def unique_id(self) -> str | None:
         return self._unique_id
 
-    async def async_update(self):
-        """Get the latest details."""
+    async def async_added_to_hass(self) -> None:
+        """Restore the last known state."""
+        await super().async_added_to_hass()
+        # The first poll runs in the background : show the state before the restart meanwhile
+        if self.coordinator.data is None and self.coordinator.last_update_success:
+            if (last_state := await self.async_get_last_state()) is not None:
+                self._restore_state(last_state)
+
+    def _restore_state(self, last_state: State) -> None:
+        """Show the state saved before the restart, flagged as stale."""
         try:
-            _LOGGER.debug("MPC udpate : %s", self._url)
-            response = await self._session.get(f"{self._url}/variables.html", timeout=ClientTimeout(3))
-            mpchc_variables = re.findall(r'<p id="(.+?)">(.+?)</p>', await response.text(encoding="utf-8"))
-
-            _LOGGER.debug("MPC data %s", mpchc_variables)
-            for var in mpchc_variables:
-                self._player_variables[var[0]] = var[1].lower()
-
-            state = self._player_variables.get("state", None)
-            if state is None:
-                self._media_state = MediaPlayerState.OFF
-            elif state == "2":
-                self._media_state = MediaPlayerState.PLAYING
-            elif state == "1":
-                self._media_state = MediaPlayerState.PAUSED
-            else:
-                self._media_state = MediaPlayerState.IDLE
-            try:
-                self._media_last_updated = dt_util.utcnow()
-                duration = self._player_variables.get("durationstring", "00:00:00").split(":")
-                self._media_duration = int(duration[0]) * 3600 + int(duration[1]) * 60 + int(duration[2])
-                position = self._player_variables.get("positionstring", "00:00:00").split(":")
-                self._media_position = int(position[0]) * 3600 + int(position[1]) * 60 + int(position[2])
-                self._media_title = self._player_variables.get("file", None)
-                if self._media_title:
-                    self._media_title = self._media_title.rsplit(".", 1)[0]
-            except Exception as ex:
-                pass
-            self._available = True
-        except (ServerTimeoutError, HTTPRequestTimeout, ClientConnectionError) as exr:
-            _LOGGER.debug("MPC error %s", exr)
-            if self.available:
-                _LOGGER.error("Could not connect to MPC-HC at: %s", self._url)
-
-            self._player_variables = {}
-            self._available = False
-        except Exception as ex:
-            _LOGGER.debug("MPC error %s", ex)
+            self._media_state = MediaPlayerState(last_state.state)
+        except ValueError:
+            return
+        attributes = last_state.attributes
+        self._media_title = attributes.get(ATTR_MEDIA_TITLE)
+        self._media_duration = attributes.get(ATTR_MEDIA_DURATION)
+        # The frontend would move a playing position forward across the whole downtime : only restore a still one
+        if self._media_state is not MediaPlayerState.PLAYING:
+            self._media_position = attributes.get(ATTR_MEDIA_POSITION)
+            updated_at = attributes.get(ATTR_MEDIA_POSITION_UPDATED_AT)
+            self._media_last_updated = dt_util.parse_datetime(updated_at) if isinstance(updated_at, str) else updated_at
+        volume = attributes.get(ATTR_MEDIA_VOLUME_LEVEL)
+        self._restored_state = PlayerState(
+            volume=round(volume * 100) if volume is not None else None,
+            muted=bool(attributes.get(ATTR_MEDIA_VOLUME_MUTED)),
+        )
+        self._stale = True
+
+    @property
+    def _player_state(self) -> PlayerState | None:
+        """Return the state of the last successful poll, including optimistic changes."""
+        if self._stale:
+            return self._restored_state
+        return self.coordinator.player_state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Flag a state restored from before the restart, not confirmed by a poll yet."""
+        return {"stale": self._stale}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle updated data from the coordinator, write state only on visible changes."""
+        self._stale = False
+        self._restored_state = None
+        self._update_from_state()
+        fingerprint = self._state_fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+        self._fingerprint = fingerprint
+        super()._handle_coordinator_update()
+
+    def _state_fingerprint(self) -> tuple:
+        """Return the user visible attributes of the entity."""
+        return (
+            self.available,
+            self._stale,
+            self._media_state,
+            self._media_title,
+            self._media_duration,
+            self._media_position,
+            self._media_last_updated,
+            self.volume_level,
+            self.is_volume_muted,
+            self.media_image_hash,
+        )
+
+    def _update_from_state(self) -> None:
+        """Compute the media attributes from the polled state."""
+        player_state = self._player_state
+        state = player_state.state if player_state is not None else None
+        if state is None:
+            self._media_state = MediaPlayerState.OFF
+        elif state is PlaybackState.PLAYING:
+            self._media_state = MediaPlayerState.PLAYING
+        elif state is PlaybackState.PAUSED:
+            self._media_state = MediaPlayerState.PAUSED
+        else:
+            self._media_state = MediaPlayerState.IDLE
+        clock = self.coordinator.clock
+        self._media_duration = clock.duration / 1000 if clock.duration is not None else None
+        self._media_position = clock.position / 1000 if clock.position is not None else None
+        self._media_last_updated = clock.updated_at
+        self._media_title = player_state.file if player_state is not None else None
+        if self._media_title:
+            self._media_title = self._media_title.rsplit(".", 1)[0]
 
     async def _send_command(self, command_id):
         """Send a command to MPC-HC via its window message ID."""
+        self.coordinator.async_apply_command(command_id)
         try:
-            params = {"wm_command": command_id}
-            _LOGGER.debug("Send command %s %s", f"{self._url}/command.html", params)
-            await self._session.get(f"{self._url}/command.html", params=params, timeout=ClientTimeout(3))
-        except (ServerTimeoutError, HTTPRequestTimeout, ClientConnectionError):
-            _LOGGER.error(
-                "Could not send command %d to MPC-HC at: %s", command_id, self._url
-            )
+            await self.coordinator.client.async_send_command(command_id)
+        except MpcHcConnectionError as ex:
+            _LOGGER.error(ex)
+            self.coordinator.async_rollback()
+            return
+        self.coordinator.async_command_sent()
 
     @property
     def name(self):
@@ -176,11 +303,6 @@ class MpcHcDevice(MediaPlayerEntity):
     def media_content_type(self) -> MediaType | str | None:
         return self._media_type
 
-    @property
-    def available(self):
-        """Return True if entity is available."""
-        return self._available
-
     @property
     def media_title(self):
         """Return the title of current playing media."""
@@ -189,20 +311,23 @@ class MpcHcDevice(MediaPlayerEntity):
     @property
     def volume_level(self):
         """Return the volume level of the media player (0..1)."""
-        return int(self._player_variables.get("volumelevel", 0)) / 100.0
+        player_state = self._player_state
+        if player_state is None or player_state.volume is None:
+            return 0.0
+        return player_state.volume / 100.0
 
     @property
     def is_volume_muted(self):
         """Return boolean if volume is currently muted."""
-        return self._player_variables.get("muted", "0") == "1"
+        return self._player_state is not None and self._player_state.muted
 
     @property
-    def media_duration(self) -> int | None:
+    def media_duration(self) -> float | None:
         """Return the duration of the current playing media in seconds."""
         return self._media_duration
 
     @property
-    def media_position(self) -> int | None:
+    def media_position(self) -> float | None:
         """Return the position of the current playing media in seconds."""
         return self._media_position
 
@@ -220,15 +345,12 @@ class MpcHcDevice(MediaPlayerEntity):
         await self._send_command(816)
 
     async def async_media_seek(self, position: float) -> None:
-        try:
-            params = {"wm_command": -1, "position": str(datetime.timedelta(seconds=position))}
-            await self._session.post(f"{self._url}/command.html", params=params, timeout=ClientTimeout(3))
-            await self.async_update()
-            self.async_schedule_update_ha_state()
-        except (ServerTimeoutError, HTTPRequestTimeout, ClientConnectionError):
-            _LOGGER.error(
-                "Could not send command %d to MPC-HC at: %s", -1, self._url
-            )
+        """Seek to a position, only the latest one is sent while scrubbing."""
+        await self.coordinator.async_seek(position)
+
+    async def async_set_volume_level(self, volume: float) -> None:
+        """Set the absolute volume level (0..1), only the latest one is sent while sliding."""
+        await self.coordinator.async_set_volume(round(volume * 100))
 
     async def async_volume_up(self):
         """Volume up the media player."""
@@ -240,7 +362,9 @@ class MpcHcDevice(MediaPlayerEntity):
 
     async def async_mute_volume(self, mute):
         """Mute the volume."""
-        await self._send_command(909)
+        # The command toggles the mute state
+        if mute != self.is_volume_muted:
+            await self._send_command(COMMAND_MUTE)
 
     async def async_media_play(self):
         """Send play command."""
@@ -265,3 +389,74 @@ class MpcHcDevice(MediaPlayerEntity):
     async def async_media_previous_track(self):
         """Send previous track command."""
         await self._send_command(919)
+
+    async def async_browse_media(
+            self,
+            media_content_type: MediaType | str | None = None,
+            media_content_id: str | None = None,
+    ) -> BrowseMedia:
+        """Browse the files of the player, a folder is only listed when expanded."""
+        path, _, page = (media_content_id or "").partition(PAGE_SEPARATOR)
+        try:
+            page = int(page or 0)
+        except ValueError:
+            page = -1
+        if page < 0:
+            raise BrowseError(f"Invalid page in {media_content_id}")
+        try:
+            entries = await self.coordinator.client.async_get_directory(path or None)
+        except MpcHcConnectionError as ex:
+            raise BrowseError(str(ex)) from ex
+        if page and page * BROWSER_PAGE_SIZE >= len(entries):
+            raise BrowseError(f"No page {page + 1} in {path or 'files'}")
+        title = path.rstrip("\\").rsplit("\\", 1)[-1] if path else self._name
+        return _directory_media(path, title, entries, page)
+
+    async def async_play_media(self, media_type: MediaType | str, media_id: str, **kwargs: Any) -> None:
+        """Open a file browsed on the player, at its saved position with extra: {resume: true}."""
+        try:
+            if kwargs.get(ATTR_MEDIA_EXTRA, {}).get("resume"):
+                await self.coordinator.async_resume(media_id)
+                return
+            await self.coordinator.client.async_open_file(media_id)
+        except MpcHcConnectionError as ex:
+            _LOGGER.error(ex)
+            return
+        self.coordinator.async_command_sent()
+
+    def _snapshot_key(self) -> tuple[str, int] | None:
+        """Return the file and position bucket identifying the current snapshot."""
+        filepath = self._player_state.filepath if self._player_state is not None else None
+        position = self.coordinator.clock.position_at(dt_util.utcnow())
+        if not filepath or position is None or self._media_state not in (
+                MediaPlayerState.PLAYING, MediaPlayerState.PAUSED):
+            return None
+        return filepath, int(position // (SNAPSHOT_POSITION_BUCKET.total_seconds() * 1000))
+
+    @property
+    def media_image_hash(self) -> str | None:
+        """Return a hash changing with the file and the position bucket."""
+        key = self._snapshot_key()
+        if key is None:
+            return None
+        return hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+
+    async def async_get_media_image(self) -> tuple[bytes | None, str | None]:
+        """Return a snapshot of the current frame."""
+        key = self._snapshot_key()
+        if key is None:
+            return None, None
+        image = await self._snapshots.async_get(key, self._async_fetch_snapshot)
+        if image is None:
+            return None, None
+        return image, "image/jpeg"
+
+    async def _async_fetch_snapshot(self) -> bytes | None:
+        try:
+            image = await self.coordinator.client.async_get_snapshot()
+        except MpcHcConnectionError as ex:
+            _LOGGER.debug(ex)
+            return None
+        if image is None:
+            return None
+        return await self.hass.async_add_executor_job(downscale, image, SNAPSHOT_MAX_WIDTH)
@@ -0,0 +1,110 @@
+"""Parsers for the MPC-HC variables.html and status.html pages.
+
+variables.html is a flat list of ``<p id="name">value</p>`` lines. The parser
+works on raw bytes as they arrive from the socket, scans every complete tag
+once, only extracts the variables the integration knows about and keeps
+values in their original case (file names and paths are case sensitive).
+
+status.html is a single ``OnStatus(...)`` JavaScript call carrying the
+frequently changing variables, a fraction of the size of variables.html.
+"""
+from __future__ import annotations
+
+import html
+import re
+
+KNOWN_VARIABLES = (
+    "file",
+    "filepatharg",
+    "filepath",
+    "filedirarg",
+    "filedir",
+    "state",
+    "statestring",
+    "position",
+    "positionstring",
+    "duration",
+    "durationstring",
+    "volumelevel",
+    "muted",
+    "playbackrate",
+    "size",
+    "reloadtime",
+    "version",
+)
+
+_TAG_CLOSE = b"</p>"
+
+
+def _variables_pattern(variables) -> re.Pattern[str]:
+    """Build a pattern only matching the given variable ids."""
+    ids = "|".join(re.escape(name) for name in variables)
+    # Empty values are not matched, they are reported as missing like an unset variable
+    return re.compile(r'<p id="(' + ids + r')">([^<]+)</p>')
+
+
+_KNOWN_PATTERN = _variables_pattern(KNOWN_VARIABLES)
+
+
+class VariablesParser:
+    """Extract known variables from variables.html fed in chunks of bytes."""
+
+    __slots__ = ("_buffer", "_variables", "_pattern")
+
+    def __init__(self, variables=KNOWN_VARIABLES):
+        """Initialize the parser for the given variable ids."""
+        self._buffer = b""
+        self._variables: dict[str, str] = {}
+        self._pattern = _KNOWN_PATTERN if variables is KNOWN_VARIABLES else _variables_pattern(variables)
+
+    def feed(self, chunk: bytes) -> None:
+        """Consume a chunk of the page."""
+        buffer = self._buffer + chunk if self._buffer else chunk
+        # Only scan complete tags, keep the remainder for the next chunk
+        end = buffer.rfind(_TAG_CLOSE)
+        if end < 0:
+            self._buffer = buffer
+            return
+        end += len(_TAG_CLOSE)
+        self._buffer = buffer[end:]
+        # The tags are ASCII so a complete tag never splits a multi-byte character
+        matches = self._pattern.findall(buffer[:end].decode("utf-8", "replace"))
+        self._variables.update(matches)
+        for name, value in matches:
+            if "&" in value:
+                self._variables[name] = html.unescape(value)
+
+    def result(self) -> dict[str, str]:
+        """Return the variables parsed so far."""
+        return self._variables
+
+
+def parse_variables(data: bytes) -> dict[str, str]:
+    """Parse a complete variables.html page."""
+    parser = VariablesParser()
+    parser.feed(data)
+    return parser.result()
+
+
+_STRING = r'"((?:[^"\\]|\\.)*)"'
+_NUMBER = r"(-?\d+)"
+_STATUS_PATTERN = re.compile(
+    r"OnStatus\(\s*" + r"\s*,\s*".join((_STRING, _STRING, _NUMBER, _STRING, _NUMBER, _STRING, _NUMBER, _NUMBER, _STRING)) + r"\s*\)"
+)
+# Variables of variables.html also reported by status.html
+STATUS_VARIABLES = ("statestring", "position", "positionstring", "duration", "durationstring", "muted", "volumelevel")
+
+
+def parse_status(data: bytes) -> dict[str, str] | None:
+    """Parse status.html, None if it is not an OnStatus call.
+
+    The state is only reported as its (translated) string, the numeric state
+    is left to the caller. The path is returned as sent, JavaScript escaped, to
+    detect file changes.
+    """
+    match = _STATUS_PATTERN.search(data.decode("utf-8", "replace"))
+    if match is None:
+        return None
+    status = dict(zip(STATUS_VARIABLES, match.group(2, 3, 4, 5, 6, 7, 8)))
+    status["statusfile"] = match.group(9)
+    return status
@@ -0,0 +1,62 @@
+"""Opt-in recording of the traffic with an MPC-HC web interface.
+
+Records are JSON lines ``{"t": epoch seconds, "kind": ..., "body": ...}``:
+raw variables.html and status.html pages, command.html requests and
+connection errors. The file rotates at a bounded size and is written from a
+background thread, never from the event loop.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import time
+from collections.abc import Iterator
+from logging.handlers import QueueListener, RotatingFileHandler
+from typing import Any
+
+from .const import RECORDER_BACKUPS, RECORDER_MAX_BYTES
+
+
+class TrafficRecorder:
+    """Append the traffic of one player to a rotating file."""
+
+    def __init__(self, path: str, max_bytes: int = RECORDER_MAX_BYTES, backups: int = RECORDER_BACKUPS):
+        """Start the writer thread, the file is only opened on the first record."""
+        self.path = path
+        self._queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+
+    def record(self, kind: str, body: Any) -> None:
+        """Queue a record, bytes bodies are stored as text."""
+        if isinstance(body, bytes):
+            body = body.decode("utf-8", "replace")
+        line = json.dumps({"t": round(time.time(), 3), "kind": kind, "body": body}, ensure_ascii=False,
+                          separators=(",", ":"))
+        self._queue.put_nowait(logging.makeLogRecord({"msg": line}))
+
+    def stop(self) -> None:
+        """Flush the pending records and stop the writer thread (blocking)."""
+        self._listener.stop()
+        for handler in self._listener.handlers:
+            handler.close()
+
+
+def read_recording(path: str) -> Iterator[dict[str, Any]]:
+    """Yield the records of a recording in order, starting with the rotated files."""
+    backups = []
+    index = 1
+    while os.path.exists(f"{path}.{index}"):
+        backups.append(f"{path}.{index}")
+        index += 1
+    for file in (*reversed(backups), path):
+        if not os.path.exists(file):
+            continue
+        with open(file, encoding="utf-8") as records:
+            for line in records:
+                if line.strip():
+                    yield json.loads(line)
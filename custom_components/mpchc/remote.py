@@ -4,11 +4,8 @@ from __future__ import annotations
 from collections.abc import Iterable
 from typing import Any
 
-import aiohttp
-
-from aiohttp import ClientTimeout, ServerTimeoutError, ClientConnectionError
-from aiohttp.web_exceptions import HTTPRequestTimeout
 from homeassistant.components.remote import (
+    ATTR_ACTIVITY,
     ATTR_DELAY_SECS,
     ATTR_NUM_REPEATS,
     DEFAULT_DELAY_SECS,
@@ -21,6 +18,7 @@ from homeassistant.const import (
     CONF_HOST,
     CONF_NAME,
     CONF_PORT,
+    STATE_ON,
 )
 
 import homeassistant.helpers.config_validation as cv
@@ -29,11 +27,17 @@ import voluptuous as vol
 
 import logging
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import MPCHC_COMMANDS, DOMAIN
+from .client import MpcHcConnectionError
+from .commands import COMMANDS, Macro, MacroError, UnknownCommandError, compile_macros
+from .const import CONF_MACROS, DOMAIN
+from .coordinator import MpcHcCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -65,20 +69,29 @@ async def async_setup_entry(
         async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Add Media Player from a config entry."""
-    async_add_entities([MPCHCRemote(config_entry)])
+    coordinator: MpcHcCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities([MPCHCRemote(coordinator, config_entry)])
 
 
-class MPCHCRemote(RemoteEntity):
+class MPCHCRemote(CoordinatorEntity[MpcHcCoordinator], RemoteEntity, RestoreEntity):
     """Android TV Remote Entity."""
 
     _attr_supported_features = RemoteEntityFeature.ACTIVITY
 
-    def __init__(self, config_entry: ConfigEntry):
+    def __init__(self, coordinator: MpcHcCoordinator, config_entry: ConfigEntry):
         """Initialize the MPC-HC device."""
+        super().__init__(coordinator)
         self._name = config_entry.data[CONF_NAME]
-        self._url = f'{config_entry.data[CONF_HOST]}:{config_entry.data[CONF_PORT]}'
-        self._available = True
-        self._session = aiohttp.ClientSession()
+        self._url = coordinator.client.url
+        self._last_is_on = None
+        # State before the restart, shown until the first poll
+        self._restored_is_on: bool | None = None
+        # Validated by the options flow, compiled once here
+        try:
+            self._macros: dict[str, Macro] = compile_macros(config_entry.options.get(CONF_MACROS, ""))
+        except MacroError as ex:
+            _LOGGER.error("Invalid MPC-HC macros, ignored : %s", ex)
+            self._macros = {}
         entity_name = self._url.lstrip('http://')
         self._unique_id = ENTITY_ID_FORMAT.format(
             f"{entity_name}_remote")
@@ -104,22 +117,84 @@ class MPCHCRemote(RemoteEntity):
     def supported_features(self) -> RemoteEntityFeature:
         return self._attr_supported_features
 
+    @property
+    def activity_list(self) -> list[str] | None:
+        """Return the macros defined in the options."""
+        return list(self._macros) or None
+
+    @property
+    def current_activity(self) -> str | None:
+        """Macros are one-shot sequences, none is ever current."""
+        return None
+
+    @property
+    def available(self) -> bool:
+        """The remote can send commands even when the last poll failed."""
+        return True
+
+    async def async_added_to_hass(self) -> None:
+        """Restore the last known state until the first poll completes."""
+        await super().async_added_to_hass()
+        if self.coordinator.data is None and self.coordinator.last_update_success:
+            if (last_state := await self.async_get_last_state()) is not None:
+                self._restored_is_on = last_state.state == STATE_ON
+
+    @property
+    def is_on(self) -> bool:
+        """Return True if MPC-HC answered the last poll."""
+        if self._restored_is_on is not None:
+            return self._restored_is_on
+        return self.coordinator.last_update_success and self.coordinator.data is not None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the player is turned on or off."""
+        self._restored_is_on = None
+        if self.is_on == self._last_is_on:
+            return
+        self._last_is_on = self.is_on
+        super()._handle_coordinator_update()
+
     async def async_send_command(self, command: Iterable[str], **kwargs: Any) -> None:
         """Send commands to one device."""
         num_repeats = kwargs.get(ATTR_NUM_REPEATS, DEFAULT_NUM_REPEATS)
         delay_secs = kwargs.get(ATTR_DELAY_SECS, DEFAULT_DELAY_SECS)
         # hold_secs = kwargs.get(ATTR_HOLD_SECS, DEFAULT_HOLD_SECS)
 
-        _LOGGER.debug("async_send_command %s %d repeats %d delay", ''.join(list(command)), num_repeats, delay_secs)
-
-        for _ in range(num_repeats):
-            for single_command in command:
-                single_command = MPCHC_COMMANDS.get(single_command, single_command)
-                _LOGGER.debug("Remote command %", single_command)
-                try:
-                    params = {"wm_command": single_command}
-                    await self._session.get(f"{self._url}/command.html", params=params, timeout=ClientTimeout(3))
-                except (ServerTimeoutError, HTTPRequestTimeout, ClientConnectionError):
-                    _LOGGER.error(
-                        "Could not send command %d to MPC-HC at: %s", single_command, self._url
-                    )
+        try:
+            commands = [COMMANDS.id(single_command) for single_command in command]
+        except UnknownCommandError as ex:
+            raise HomeAssistantError(str(ex)) from ex
+        _LOGGER.debug("async_send_command %s %d repeats %s delay", commands, num_repeats, delay_secs)
+
+        steps = [self.coordinator.client.command_step(single_command) for single_command in commands] * num_repeats
+        for single_command in commands * num_repeats:
+            self.coordinator.async_apply_command(single_command)
+        try:
+            await self.coordinator.client.async_send_commands(steps, delay_secs)
+        except MpcHcConnectionError as ex:
+            _LOGGER.error(ex)
+            self.coordinator.async_rollback()
+            return
+
+        self.coordinator.async_command_sent()
+
+    async def async_turn_on(self, **kwargs: Any) -> None:
+        """Run the macro given as activity, MPC-HC itself can't be turned on remotely."""
+        activity = kwargs.get(ATTR_ACTIVITY)
+        if activity is None:
+            return
+        macro = self._macros.get(activity)
+        if macro is None:
+            raise HomeAssistantError(f"Unknown MPC-HC macro: {activity}")
+        _LOGGER.debug("Run macro %s", macro.name)
+        for step in macro.steps:
+            self.coordinator.async_apply_command(step.command_id)
+        try:
+            await self.coordinator.client.async_send_scheduled(macro.schedule)
+        except MpcHcConnectionError as ex:
+            _LOGGER.error(ex)
+            self.coordinator.async_rollback()
+            return
+
+        self.coordinator.async_command_sent()
@@ -0,0 +1,125 @@
+"""Last playback position of the files played on an MPC-HC player."""
+from __future__ import annotations
+
+from collections import OrderedDict
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DOMAIN,
+    RESUME_STORAGE_VERSION,
+    RESUME_MAX_FILES,
+    RESUME_SAVE_DELAY,
+    RESUME_MIN_POSITION,
+    RESUME_FINISHED_RATIO,
+)
+from .state import PlaybackState, PlayerState
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def file_key(path: str) -> str:
+    """Return the index key of a Windows path, which is case insensitive."""
+    return path.replace("/", "\\").casefold()
+
+
+def _store(hass: HomeAssistant, config_entry: ConfigEntry) -> Store:
+    return Store(hass, RESUME_STORAGE_VERSION, f"{DOMAIN}.resume.{config_entry.entry_id}")
+
+
+class ResumeIndex:
+    """Positions in seconds of the most recently played files, least recent evicted first.
+
+    Polls only update the map in memory. A change schedules a single write
+    of the whole index after the save delay, the polls until then don't
+    touch the disk.
+    """
+
+    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry, max_files: int = RESUME_MAX_FILES):
+        """Initialize an empty index, filled by async_load."""
+        self._store = _store(hass, config_entry)
+        self._max_files = max_files
+        # key -> (path, position, duration) in seconds, least recently played first
+        self._files: OrderedDict[str, tuple[str, int, int | None]] = OrderedDict()
+        self._save_pending = False
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    async def async_load(self) -> None:
+        """Load the persisted index."""
+        data = await self._store.async_load()
+        if not data:
+            return
+        for path, position, duration in data.get("files", [])[-self._max_files:]:
+            self._files[file_key(path)] = (path, position, duration)
+        _LOGGER.debug("MPC resume index loaded with %d files", len(self._files))
+
+    def position(self, path: str) -> int | None:
+        """Return the saved position of a file in seconds."""
+        entry = self._files.get(file_key(path))
+        return entry[1] if entry is not None else None
+
+    def last(self) -> tuple[str, int] | None:
+        """Return the path and the position of the file played last."""
+        if not self._files:
+            return None
+        path, position, _duration = self._files[next(reversed(self._files))]
+        return path, position
+
+    @callback
+    def async_update(self, state: PlayerState | None) -> None:
+        """Record the position of the polled state."""
+        if (
+            state is None
+            or not state.filepath
+            or state.position is None
+            or state.state not in (PlaybackState.PLAYING, PlaybackState.PAUSED)
+        ):
+            return
+        key = file_key(state.filepath)
+        position = state.position // 1000
+        duration = state.duration // 1000 if state.duration else None
+        if duration and position >= duration * RESUME_FINISHED_RATIO:
+            # Watched to the end : the next play starts over
+            if self._files.pop(key, None) is not None:
+                self._async_schedule_save()
+            return
+        if position < RESUME_MIN_POSITION.total_seconds():
+            # Just opened, maybe before being resumed : keep the saved position
+            return
+        entry = (state.filepath, position, duration)
+        if self._files.get(key) == entry:
+            return
+        self._files[key] = entry
+        self._files.move_to_end(key)
+        if len(self._files) > self._max_files:
+            self._files.popitem(last=False)
+        self._async_schedule_save()
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        # Store.async_delay_save pushes the write back on every call : only schedule it once
+        if self._save_pending:
+            return
+        self._save_pending = True
+        self._store.async_delay_save(self._data_to_save, RESUME_SAVE_DELAY.total_seconds())
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_pending = False
+        return {"files": [list(entry) for entry in self._files.values()]}
+
+    async def async_flush(self) -> None:
+        """Write the pending changes now (the player is unloaded)."""
+        if self._save_pending:
+            await self._store.async_save(self._data_to_save())
+
+
+async def async_remove_index(hass: HomeAssistant, config_entry: ConfigEntry) -> None:
+    """Delete the index of a removed player."""
+    await _store(hass, config_entry).async_remove()
@@ -0,0 +1,124 @@
+"""Diagnostic sensors reporting the performance of an MPC-HC web interface."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME, EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .client import MpcHcClient
+from .const import DOMAIN, DEFAULT_NAME
+from .coordinator import MpcHcCoordinator
+
+# The counters change on every request : sample them instead of following the coordinator
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+def _latency(percent: float) -> Callable[[MpcHcClient], float | None]:
+    def value(client: MpcHcClient) -> float | None:
+        latency = client.stats.poll_latency().percentile(percent)
+        # Beyond the last bucket the latency is unknown
+        return latency if latency != float("inf") else None
+    return value
+
+
+@dataclass(frozen=True, kw_only=True)
+class MpcHcSensorEntityDescription(SensorEntityDescription):
+    """Describe an MPC-HC diagnostic sensor."""
+
+    value_fn: Callable[[MpcHcClient], float | int | None]
+
+
+SENSORS: tuple[MpcHcSensorEntityDescription, ...] = (
+    MpcHcSensorEntityDescription(
+        key="poll_latency_p50",
+        name="Poll latency p50",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_latency(50),
+    ),
+    MpcHcSensorEntityDescription(
+        key="poll_latency_p99",
+        name="Poll latency p99",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=_latency(99),
+    ),
+    MpcHcSensorEntityDescription(
+        key="bytes_received",
+        name="Bytes received",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda client: client.stats.bytes_received,
+    ),
+    MpcHcSensorEntityDescription(
+        key="timeouts",
+        name="Timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda client: client.stats.timeouts,
+    ),
+    MpcHcSensorEntityDescription(
+        key="errors",
+        name="Connection errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda client: client.stats.errors,
+    ),
+    MpcHcSensorEntityDescription(
+        key="command_queue_depth",
+        name="Command queue depth",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda client: client.queue_depth,
+    ),
+)
+
+
+async def async_setup_entry(
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Add the diagnostic sensors from a config entry."""
+    coordinator: MpcHcCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    async_add_entities(MpcHcSensor(coordinator, config_entry, description) for description in SENSORS)
+
+
+class MpcHcSensor(SensorEntity):
+    """Performance counter of an MPC-HC player, disabled by default."""
+
+    entity_description: MpcHcSensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, coordinator: MpcHcCoordinator, config_entry: ConfigEntry,
+                 description: MpcHcSensorEntityDescription):
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._client = coordinator.client
+        self._device_name = config_entry.data[CONF_NAME]
+        self._attr_name = f"{self._device_name} {description.name}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{description.key}"
+
+    @property
+    def device_info(self) -> DeviceInfo:
+        """Return the device info."""
+        return DeviceInfo(
+            identifiers={(DOMAIN, self._client.url)},
+            name=self._device_name,
+            manufacturer=DEFAULT_NAME,
+            model=""
+        )
+
+    @property
+    def native_value(self) -> float | int | None:
+        """Return the current value of the counter."""
+        return self.entity_description.value_fn(self._client)
@@ -0,0 +1,204 @@
+"""Services of the MPC-HC integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.const import ATTR_ENTITY_ID
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import slugify
+
+from .client import MpcHcConnectionError
+from .const import (
+    DOMAIN,
+    SERVICE_BROADCAST,
+    SERVICE_START_RECORDING,
+    SERVICE_STOP_RECORDING,
+    SERVICE_RESUME,
+    RECORDER_MAX_BYTES,
+    BROADCAST_DEFAULT_DELAY,
+    BROADCAST_MAX_DELAY,
+    COMMAND_SEEK,
+)
+from .commands import COMMANDS, UnknownCommandError
+from .coordinator import MpcHcCoordinator
+from .recorder import TrafficRecorder
+
+_LOGGER = logging.getLogger(__name__)
+
+ATTR_COMMAND = "command"
+ATTR_SEEK_POSITION = "seek_position"
+ATTR_DELAY = "delay"
+ATTR_MAX_SIZE = "max_size"
+ATTR_MEDIA_ID = "media_id"
+ATTR_POSITION = "position"
+
+
+def _command_id(value: Any) -> str:
+    """Validate a command name of the remote entity or a numeric command id."""
+    try:
+        return COMMANDS.id(cv.string(value))
+    except UnknownCommandError as ex:
+        raise vol.Invalid(str(ex)) from ex
+
+
+BROADCAST_SCHEMA = vol.All(
+    vol.Schema({
+        vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+        vol.Exclusive(ATTR_COMMAND, "action"): _command_id,
+        vol.Exclusive(ATTR_SEEK_POSITION, "action"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(ATTR_DELAY, default=BROADCAST_DEFAULT_DELAY.total_seconds()): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=BROADCAST_MAX_DELAY.total_seconds())
+        ),
+    }),
+    cv.has_at_least_one_key(ATTR_COMMAND, ATTR_SEEK_POSITION),
+)
+
+
+RECORDING_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Optional(ATTR_MAX_SIZE, default=RECORDER_MAX_BYTES // (1024 * 1024)): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=100)
+    ),
+})
+
+STOP_RECORDING_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+})
+
+RESUME_SCHEMA = vol.Schema({
+    vol.Required(ATTR_ENTITY_ID): cv.entity_ids,
+    vol.Optional(ATTR_MEDIA_ID): cv.string,
+    vol.Optional(ATTR_POSITION): vol.All(vol.Coerce(float), vol.Range(min=0)),
+})
+
+
+def _coordinators(hass: HomeAssistant, entity_ids: list[str]) -> list[MpcHcCoordinator]:
+    """Return the players of the entities, once per player (media player and remote share it)."""
+    registry = er.async_get(hass)
+    coordinators: dict[str, MpcHcCoordinator] = {}
+    for entity_id in entity_ids:
+        entry = registry.async_get(entity_id)
+        if entry is None or entry.platform != DOMAIN or entry.config_entry_id not in hass.data.get(DOMAIN, {}):
+            raise HomeAssistantError(f"{entity_id} is not an MPC-HC entity")
+        coordinators[entry.config_entry_id] = hass.data[DOMAIN][entry.config_entry_id]
+    return list(coordinators.values())
+
+
+async def _async_dispatch(
+        coordinator: MpcHcCoordinator, deadline: float, command_id: str | None, position: float | None
+) -> dict[str, Any]:
+    """Send the command to one player at the deadline, return its timings in ms from the deadline."""
+    loop = asyncio.get_running_loop()
+    # Fire ahead by the estimated one-way latency so the request reaches the player at the deadline
+    latency = coordinator.client.stats.latency.get("command")
+    lead = latency.mean / 2000 if latency is not None and latency.mean is not None else 0.0
+    await asyncio.sleep(max(0.0, deadline - lead - loop.time()))
+    sent = loop.time()
+    if position is not None:
+        coordinator.async_apply_command(COMMAND_SEEK, position=position)
+        request = coordinator.client.async_seek(str(timedelta(seconds=position)))
+    else:
+        coordinator.async_apply_command(command_id)
+        request = coordinator.client.async_send_command(command_id)
+    timings: dict[str, Any] = {"sent_ms": round((sent - deadline) * 1000, 2)}
+    try:
+        await request
+    except MpcHcConnectionError as ex:
+        coordinator.async_rollback()
+        timings["error"] = str(ex)
+        return timings
+    timings["completed_ms"] = round((loop.time() - deadline) * 1000, 2)
+    coordinator.async_command_sent()
+    return timings
+
+
+async def _async_broadcast(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Send a command or a seek to several players at the same time."""
+    coordinators = _coordinators(hass, call.data[ATTR_ENTITY_ID])
+    deadline = asyncio.get_running_loop().time() + call.data[ATTR_DELAY]
+    results = await asyncio.gather(*(
+        _async_dispatch(coordinator, deadline, call.data.get(ATTR_COMMAND), call.data.get(ATTR_SEEK_POSITION))
+        for coordinator in coordinators
+    ))
+    players = {coordinator.client.url: timings for coordinator, timings in zip(coordinators, results)}
+    completed = [timings["completed_ms"] for timings in results if "completed_ms" in timings]
+    spread = round(max(completed) - min(completed), 2) if completed else None
+    _LOGGER.debug("MPC-HC broadcast to %d players, completion spread %s ms", len(players), spread)
+    return {"players": players, "spread_ms": spread}
+
+
+async def _async_start_recording(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Record the traffic of the players to a rotating file in the configuration folder."""
+    files = {}
+    for coordinator in _coordinators(hass, call.data[ATTR_ENTITY_ID]):
+        client = coordinator.client
+        if client.recorder is None:
+            path = hass.config.path(f"mpchc_{slugify(client.url)}.jsonl")
+            client.recorder = TrafficRecorder(path, call.data[ATTR_MAX_SIZE] * 1024 * 1024)
+            _LOGGER.info("Recording the traffic of MPC-HC at %s to %s", client.url, path)
+        files[client.url] = client.recorder.path
+    return {"files": files}
+
+
+async def _async_stop_recording(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Stop recording the traffic of the players."""
+    for coordinator in _coordinators(hass, call.data[ATTR_ENTITY_ID]):
+        await coordinator.client.async_stop_recording()
+
+
+async def _async_resume(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Open a file (the file played last if not given) at its saved position."""
+    players = {}
+    for coordinator in _coordinators(hass, call.data[ATTR_ENTITY_ID]):
+        path = call.data.get(ATTR_MEDIA_ID)
+        if path is None:
+            if (last := coordinator.resume.last()) is None:
+                raise HomeAssistantError(f"No file played on MPC-HC at {coordinator.client.url} to resume")
+            path = last[0]
+        position = await coordinator.async_resume(path, call.data.get(ATTR_POSITION))
+        players[coordinator.client.url] = {"file": path, "position": position}
+    return {"players": players}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration once."""
+    if hass.services.has_service(DOMAIN, SERVICE_BROADCAST):
+        return
+
+    async def async_broadcast(call: ServiceCall) -> ServiceResponse:
+        return await _async_broadcast(hass, call)
+
+    async def async_start_recording(call: ServiceCall) -> ServiceResponse:
+        return await _async_start_recording(hass, call)
+
+    async def async_stop_recording(call: ServiceCall) -> None:
+        await _async_stop_recording(hass, call)
+
+    async def async_resume(call: ServiceCall) -> ServiceResponse:
+        return await _async_resume(hass, call)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BROADCAST, async_broadcast, schema=BROADCAST_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_START_RECORDING, async_start_recording, schema=RECORDING_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(DOMAIN, SERVICE_STOP_RECORDING, async_stop_recording, schema=STOP_RECORDING_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_RESUME, async_resume, schema=RESUME_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the services once the last player is unloaded."""
+    for service in (SERVICE_BROADCAST, SERVICE_START_RECORDING, SERVICE_STOP_RECORDING, SERVICE_RESUME):
+        hass.services.async_remove(DOMAIN, service)
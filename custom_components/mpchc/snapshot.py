@@ -0,0 +1,67 @@
+"""Now playing snapshots taken from the MPC-HC snapshot.jpg page."""
+from __future__ import annotations
+
+import asyncio
+import io
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from time import monotonic
+
+from .const import SNAPSHOT_CACHE_SIZE, SNAPSHOT_MIN_INTERVAL
+
+
+def downscale(image: bytes, max_width: int) -> bytes:
+    """Return the JPEG image reduced to max_width, unchanged if Pillow is not available."""
+    try:
+        from PIL import Image
+    except ImportError:
+        return image
+    with Image.open(io.BytesIO(image)) as picture:
+        if picture.width <= max_width:
+            return image
+        picture.thumbnail((max_width, max_width * picture.height // picture.width))
+        output = io.BytesIO()
+        picture.convert("RGB").save(output, "JPEG", quality=80)
+        return output.getvalue()
+
+
+class SnapshotCache:
+    """LRU cache of snapshots with a minimum interval between two fetches.
+
+    However many dashboards request the image, at most one snapshot is
+    fetched per interval : other requests share the fetch in flight or get
+    no image. A snapshot is only returned for the key it was taken for, the
+    image proxy caches it under the hash of that key.
+    """
+
+    def __init__(self, max_size: int = SNAPSHOT_CACHE_SIZE, min_interval: float = SNAPSHOT_MIN_INTERVAL.total_seconds()):
+        """Initialize an empty cache."""
+        self._max_size = max_size
+        self._min_interval = min_interval
+        self._images: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._next_fetch = 0.0
+        self._lock = asyncio.Lock()
+
+    def _get(self, key: Hashable) -> bytes | None:
+        image = self._images.get(key)
+        if image is not None:
+            self._images.move_to_end(key)
+        return image
+
+    async def async_get(self, key: Hashable, fetch: Callable[[], Awaitable[bytes | None]]) -> bytes | None:
+        """Return the snapshot of key, fetching it if allowed."""
+        if (image := self._get(key)) is not None:
+            return image
+        async with self._lock:
+            if (image := self._get(key)) is not None:
+                return image
+            if monotonic() < self._next_fetch:
+                return None
+            self._next_fetch = monotonic() + self._min_interval
+            image = await fetch()
+            if image is None:
+                return None
+            self._images[key] = image
+            while len(self._images) > self._max_size:
+                self._images.popitem(last=False)
+            return image
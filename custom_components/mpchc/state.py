@@ -0,0 +1,185 @@
+"""Typed model of the variables reported by MPC-HC."""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from enum import IntEnum
+from typing import Any
+
+from .const import STATUS_STATES
+
+# Fields compared between two polls, the position is followed by the playback clock
+DIFF_FIELDS = ("state", "file", "filepath", "duration", "volume", "muted", "rate")
+
+
+class PlaybackState(IntEnum):
+    """Numeric state of variables.html."""
+
+    CLOSED = -1
+    STOPPED = 0
+    PAUSED = 1
+    PLAYING = 2
+
+
+def _int(value: str | None) -> int | None:
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _milliseconds(variables: dict[str, str], name: str) -> int | None:
+    """Return a time variable in ms, falling back to its H:MM:SS string."""
+    if (value := _int(variables.get(name))) is not None:
+        return value
+    try:
+        hours, minutes, seconds = variables.get(f"{name}string", "00:00:00").split(":")
+        return (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000
+    except ValueError:
+        return None
+
+
+def _float(value: str | None) -> float | None:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerState:
+    """State of the player parsed once per poll.
+
+    Times are in ms, the file and path keep their original case. Missing or
+    invalid variables are None (muted is False).
+    """
+
+    state: PlaybackState | None = None
+    statestring: str = ""
+    file: str | None = None
+    filepath: str | None = None
+    filedir: str | None = None
+    position: int | None = None
+    duration: int | None = None
+    volume: int | None = None
+    muted: bool = False
+    rate: float | None = None
+    size: str | None = None
+    version: str | None = None
+
+    @property
+    def playing(self) -> bool:
+        """Return True while playing."""
+        return self.state is PlaybackState.PLAYING
+
+    @classmethod
+    def from_variables(cls, variables: dict[str, str]) -> PlayerState:
+        """Build the state from the variables of variables.html."""
+        try:
+            state = PlaybackState(int(variables["state"]))
+        except (KeyError, ValueError):
+            state = None
+        return cls(
+            state=state,
+            # An empty statestring (closed player) is missing from the variables
+            statestring=variables.get("statestring", ""),
+            file=variables.get("file"),
+            filepath=variables.get("filepath"),
+            filedir=variables.get("filedir"),
+            position=_milliseconds(variables, "position"),
+            duration=_milliseconds(variables, "duration"),
+            volume=_int(variables.get("volumelevel")),
+            muted=variables.get("muted") == "1",
+            rate=_float(variables.get("playbackrate")),
+            size=variables.get("size"),
+            version=variables.get("version"),
+        )
+
+    def with_status(self, status: dict[str, str], state: PlaybackState) -> PlayerState:
+        """Return the state updated with the variables of status.html."""
+        return replace(
+            self,
+            state=state,
+            statestring=status["statestring"],
+            position=_milliseconds(status, "position"),
+            duration=_milliseconds(status, "duration"),
+            volume=_int(status["volumelevel"]),
+            muted=status["muted"] == "1",
+        )
+
+
+class StatusMerger:
+    """Merge the status.html polls into the state of the last variables.html poll.
+
+    status.html reports a translated state string and a file path only
+    comparable to itself : the state strings and the path of the file are
+    learnt from the variables.html polls. Shared by the coordinator and the
+    replay of the recordings.
+    """
+
+    def __init__(self):
+        """Initialize with the English state strings."""
+        self._states = {name: PlaybackState(state) for name, state in STATUS_STATES.items()}
+        # status.html file of the last variables.html poll, and of a status.html poll not merged since
+        self._file: str | None = None
+        self._unmerged_file: str | None = None
+
+    def merge(self, state: PlayerState, status: dict[str, str]) -> PlayerState | None:
+        """Return the state updated with status.html, None if variables.html must be read."""
+        playback_state = self._states.get(status["statestring"])
+        if status["statusfile"] != self._file or playback_state is None:
+            # The file changed or the state string is unknown yet
+            self._unmerged_file = status["statusfile"]
+            return None
+        self._unmerged_file = None
+        return state.with_status(status, playback_state)
+
+    def learn(self, state: PlayerState) -> None:
+        """Learn the state string and the status.html file from a variables.html poll."""
+        if state.state is not None:
+            self._states[state.statestring] = state.state
+        if self._unmerged_file is not None:
+            self._file, self._unmerged_file = self._unmerged_file, None
+
+    def reset(self) -> None:
+        """Forget the status.html poll not merged, the poll failed."""
+        self._unmerged_file = None
+
+
+def _event_value(value: Any) -> Any:
+    return value.name.lower() if isinstance(value, PlaybackState) else value
+
+
+def diff_states(old: PlayerState, new: PlayerState) -> dict[str, list]:
+    """Return the changed fields as [old, new] values."""
+    return {
+        name: [_event_value(getattr(old, name)), _event_value(getattr(new, name))]
+        for name in DIFF_FIELDS
+        if getattr(old, name) != getattr(new, name)
+    }
+
+
+class StateChanges:
+    """Compare each polled state with the last reachable one.
+
+    A failed poll only changes the availability : the fields are compared
+    with the state before the outage once the player answers again, so an
+    outage doesn't look like a file change.
+    """
+
+    def __init__(self):
+        """Initialize before the first poll."""
+        self.state: PlayerState | None = None
+        self.available: bool | None = None
+
+    def update(self, state: PlayerState | None) -> dict[str, list]:
+        """Record a polled state (None if the poll failed), return the changed fields as [old, new] values."""
+        if state is None:
+            changes = {"available": [True, False]} if self.available else {}
+            self.available = False
+            return changes
+        previous, was_available = self.state, self.available
+        self.state, self.available = state, True
+        changes = diff_states(previous, state) if previous is not None else {}
+        if was_available is False:
+            changes = {"available": [False, True], **changes}
+        return changes
@@ -0,0 +1,117 @@
+"""Performance counters of one MPC-HC web interface."""
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# Upper bounds of the latency histogram buckets, in ms (the last bucket is unbounded)
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Kinds of the requests of the polls : routine status.html reads and the variables.html refreshes
+POLL_KINDS = ("status", "variables")
+
+
+class LatencyHistogram:
+    """Fixed buckets latency histogram."""
+
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, milliseconds: float) -> None:
+        """Record a measure."""
+        self.counts[bisect_left(LATENCY_BUCKETS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean latency in ms."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, percent: float) -> float | None:
+        """Return the upper bound of the bucket holding the given percentile."""
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return float(LATENCY_BUCKETS[index]) if index < len(LATENCY_BUCKETS) else float("inf")
+        return float("inf")
+
+    def merge(self, other: LatencyHistogram) -> None:
+        """Add the measures of another histogram."""
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+
+    def as_dict(self) -> dict:
+        """Return the histogram for diagnostics."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.mean, 2) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "buckets_ms": {
+                f"<={bound}" if index < len(LATENCY_BUCKETS) else f">{LATENCY_BUCKETS[-1]}": count
+                for index, (bound, count) in enumerate(zip((*LATENCY_BUCKETS, None), self.counts))
+            },
+        }
+
+
+class ClientStats:
+    """Counters updated by the client on every request."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.latency: dict[str, LatencyHistogram] = {}
+        self.parses = 0
+        self.parse_time_total = 0.0
+        self.parse_time_max = 0.0
+        self.bytes_received = 0
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def add_request(self, kind: str, milliseconds: float) -> None:
+        """Record a successful request of the given kind (variables, command...)."""
+        self.requests += 1
+        histogram = self.latency.get(kind)
+        if histogram is None:
+            histogram = self.latency[kind] = LatencyHistogram()
+        histogram.add(milliseconds)
+
+    def poll_latency(self) -> LatencyHistogram:
+        """Return the latency of all the poll requests, whichever page they read."""
+        histogram = LatencyHistogram()
+        for kind in POLL_KINDS:
+            if kind in self.latency:
+                histogram.merge(self.latency[kind])
+        return histogram
+
+    def add_parse(self, milliseconds: float) -> None:
+        """Record the time spent parsing a page."""
+        self.parses += 1
+        self.parse_time_total += milliseconds
+        self.parse_time_max = max(self.parse_time_max, milliseconds)
+
+    def as_dict(self) -> dict:
+        """Return the counters for diagnostics."""
+        return {
+            "requests": self.requests,
+            "bytes_received": self.bytes_received,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "rejected_while_unreachable": self.rejected,
+            "latency": {kind: histogram.as_dict() for kind, histogram in self.latency.items()},
+            "parse_time": {
+                "count": self.parses,
+                "mean_ms": round(self.parse_time_total / self.parses, 4) if self.parses else None,
+                "max_ms": round(self.parse_time_max, 4),
+            },
+        }
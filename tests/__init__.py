@@ -0,0 +1 @@
+"""Tests for the MPC-HC integration."""
@@ -0,0 +1,108 @@
+"""Fixtures for the MPC-HC tests, the player is the simulator of the benchmarks."""
+from __future__ import annotations
+
+from aiohttp.test_utils import TestServer
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from benchmarks.simulator import SimulatedPlayer, SimulatorOptions, create_app
+from custom_components.mpchc.client import MpcHcClient
+from custom_components.mpchc.const import DEFAULT_NAME, DOMAIN
+from custom_components.mpchc.coordinator import MpcHcCoordinator
+from custom_components.mpchc.fleet import FleetPoller
+
+FILEPATH = "D:\\Movies\\Movie.mkv"
+DURATION = 2 * 3600 * 1000
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+def player() -> SimulatedPlayer:
+    """Return a simulated player paused in a two hours file."""
+    return SimulatedPlayer(FILEPATH, DURATION, state=1)
+
+
+@pytest.fixture
+def simulator_options() -> SimulatorOptions:
+    """Return the network behaviour of the simulator, changeable during a test."""
+    return SimulatorOptions()
+
+
+@pytest.fixture
+async def simulator(socket_enabled, player, simulator_options):
+    """Serve the simulated player on a free local port."""
+    server = TestServer(create_app(player, simulator_options), host="127.0.0.1")
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+def config_entry(hass, simulator) -> MockConfigEntry:
+    """Return the config entry of the simulated player."""
+    return add_player_entry(hass, simulator.port)
+
+
+def add_player_entry(hass: HomeAssistant, port: int) -> MockConfigEntry:
+    """Add the config entry of a player served on a local port."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id=f"{DOMAIN}-http://127.0.0.1:{port}",
+        data={CONF_NAME: DEFAULT_NAME, CONF_HOST: "http://127.0.0.1", CONF_PORT: port},
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+async def coordinator(hass, config_entry, simulator):
+    """Return the coordinator of the simulated player, without its entities."""
+    client = MpcHcClient(f"http://127.0.0.1:{simulator.port}")
+    coordinator = MpcHcCoordinator(hass, config_entry, client, FleetPoller())
+    yield coordinator
+    await coordinator.async_shutdown()
+
+
+def sent(player: SimulatedPlayer, command_id: str) -> list[dict[str, str]]:
+    """Return the parameters of the requests of a command received by the player."""
+    return [params for command, params in player.commands if command == command_id]
+
+
+async def async_setup_players(hass: HomeAssistant, *config_entries: MockConfigEntry) -> list[er.RegistryEntry]:
+    """Set up the entities of simulated players, return their enabled latency sensors.
+
+    The diagnostic sensors are disabled by default : one per player is
+    enabled so the sensor platform is set up like in a real installation.
+    Setting up the integration sets up all its config entries.
+    """
+    registry = er.async_get(hass)
+    latencies = [
+        registry.async_get_or_create(
+            "sensor", DOMAIN, f"{config_entry.entry_id}_poll_latency_p50", config_entry=config_entry
+        )
+        for config_entry in config_entries
+    ]
+    assert await hass.config_entries.async_setup(config_entries[0].entry_id)
+    # The first polls run in the background : poll once more so the entities show the players
+    for config_entry in config_entries:
+        await hass.data[DOMAIN][config_entry.entry_id].async_refresh()
+    await hass.async_block_till_done()
+    return latencies
+
+
+def entity_id(hass: HomeAssistant, config_entry: MockConfigEntry, domain: str) -> str:
+    """Return the entity of a player in the given domain."""
+    (entity,) = (
+        entry.entity_id for entry in er.async_entries_for_config_entry(er.async_get(hass), config_entry.entry_id)
+        if entry.domain == domain
+    )
+    return entity
@@ -0,0 +1,60 @@
+"""Tests of the circuit breaker of the client."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.mpchc import breaker
+from custom_components.mpchc.breaker import CircuitBreaker
+
+
+@pytest.fixture
+def now(monkeypatch) -> list[float]:
+    """Return the settable clock of the breaker."""
+    clock = [1000.0]
+    monkeypatch.setattr(breaker, "monotonic", lambda: clock[0])
+    return clock
+
+
+def test_opens_after_the_threshold(now) -> None:
+    """Requests are rejected once the consecutive failures reach the threshold."""
+    circuit = CircuitBreaker(threshold=3, base_backoff=10, max_backoff=40)
+    assert not circuit.failure()
+    assert circuit.success() is False
+    assert not circuit.failure()
+    assert not circuit.failure()
+    assert circuit.allow()
+    assert circuit.failure()
+    assert circuit.is_open
+    assert not circuit.allow()
+
+
+def test_single_probe_after_the_backoff(now) -> None:
+    """A single request probes the player once the backoff elapsed, a failed probe doubles the backoff."""
+    circuit = CircuitBreaker(threshold=1, base_backoff=10, max_backoff=15)
+    assert circuit.failure()
+    now[0] += 10
+    assert circuit.allow()
+    assert not circuit.allow()
+    assert not circuit.failure()
+
+    now[0] += 10
+    assert not circuit.allow()
+    # The backoff is capped
+    now[0] += 5
+    assert circuit.allow()
+    assert not circuit.failure()
+    now[0] += 15
+    assert circuit.allow()
+    assert circuit.success()
+    assert not circuit.is_open
+    assert circuit.allow()
+
+
+def test_released_probe(now) -> None:
+    """A cancelled probe lets the next request probe again."""
+    circuit = CircuitBreaker(threshold=1, base_backoff=10)
+    circuit.failure()
+    now[0] += 10
+    assert circuit.allow()
+    circuit.release()
+    assert circuit.allow()
@@ -0,0 +1,90 @@
+"""Tests of the browsing of the files of the simulated player."""
+from __future__ import annotations
+
+import pytest
+
+from homeassistant.components.media_player import BrowseError
+
+from benchmarks.simulator import LIBRARY_ROOT, LIBRARY_SIZE, SimulatedPlayer
+from custom_components.mpchc import browser
+from custom_components.mpchc.browser import DirectoryCache, DirectoryEntry, parse_directory
+from custom_components.mpchc.const import BROWSER_PAGE_SIZE
+from custom_components.mpchc.media_player import MpcHcDevice
+
+from .conftest import DURATION, FILEPATH
+
+
+def test_parse_directory() -> None:
+    """Folders come first, the parent folder is skipped and the paths are unescaped."""
+    entries = parse_directory(SimulatedPlayer(FILEPATH, DURATION).browser_html(f"{LIBRARY_ROOT}\\Series"))
+    assert entries[0] == DirectoryEntry("Movie 0000.mkv", f"{LIBRARY_ROOT}\\Series\\Movie 0000.mkv", False)
+    assert len(entries) == 12
+
+    entries = parse_directory(SimulatedPlayer(FILEPATH, DURATION).browser_html(None))
+    assert entries[0] == DirectoryEntry("Series", f"{LIBRARY_ROOT}\\Series", True)
+    assert len(entries) == LIBRARY_SIZE + 1
+    page = (
+        '<tr class="dir"><td><a href="browser.html?path=D%3A%5CTom%20%26%20Jerry">Tom &amp; Jerry</a></td></tr>'
+        '<tr class="file"><td>No link</td></tr>'
+    )
+    assert parse_directory(page) == [DirectoryEntry("Tom & Jerry", "D:\\Tom & Jerry", True)]
+
+
+def test_directory_cache(monkeypatch) -> None:
+    """Listings expire after the TTL, the least recently used are evicted."""
+    now = [1000.0]
+    monkeypatch.setattr(browser, "monotonic", lambda: now[0])
+    cache = DirectoryCache(max_size=2, ttl=60)
+    listing = [DirectoryEntry("a.mkv", "D:\\a.mkv", False)]
+    cache.put(None, listing)
+    cache.put("D:\\a", [])
+    assert cache.get(None) is listing
+    cache.put("D:\\b", [])
+    assert cache.get("D:\\a") is None
+    assert cache.get(None) is listing
+
+    now[0] += 61
+    assert cache.get(None) is None
+    assert cache.get("D:\\b") is None
+
+
+def _browser_requests(coordinator) -> int:
+    histogram = coordinator.client.stats.latency.get("browser")
+    return histogram.count if histogram is not None else 0
+
+
+async def test_browse_pages(coordinator, config_entry) -> None:
+    """A large folder is listed a page at a time from a single cached listing."""
+    device = MpcHcDevice(coordinator, config_entry)
+    pages = -(-(LIBRARY_SIZE + 1) // BROWSER_PAGE_SIZE)
+    first = await device.async_browse_media()
+    assert len(first.children) == BROWSER_PAGE_SIZE + 1
+    assert first.children[0].can_expand
+    next_page = first.children[-1]
+    assert next_page.title == f"Next page (2/{pages})"
+
+    last = await device.async_browse_media(next_page.media_content_type, f"|{pages - 1}")
+    assert last.title.endswith(f"({pages}/{pages})")
+    assert len(last.children) == LIBRARY_SIZE + 1 - (pages - 1) * BROWSER_PAGE_SIZE
+    assert last.children[-1].media_content_id == f"{LIBRARY_ROOT}\\Movie {LIBRARY_SIZE - 1:04d}.mkv"
+    assert _browser_requests(coordinator) == 1
+
+    folder = await device.async_browse_media(first.children[0].media_content_type, first.children[0].media_content_id)
+    assert folder.title == "Series"
+    assert len(folder.children) == 12
+
+
+@pytest.mark.parametrize("media_content_id", ["|x", f"{LIBRARY_ROOT}|-1", "|99"])
+async def test_browse_invalid_page(coordinator, config_entry, media_content_id) -> None:
+    """A malformed or missing page is reported as a browse error."""
+    device = MpcHcDevice(coordinator, config_entry)
+    with pytest.raises(BrowseError):
+        await device.async_browse_media("directory", media_content_id)
+
+
+async def test_browse_unreachable(coordinator, config_entry, simulator) -> None:
+    """An unreachable player is reported as a browse error."""
+    await simulator.close()
+    device = MpcHcDevice(coordinator, config_entry)
+    with pytest.raises(BrowseError):
+        await device.async_browse_media()
@@ -0,0 +1,40 @@
+"""Tests of the playback clock extrapolating the position between polls."""
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+from custom_components.mpchc.clock import PlaybackClock
+from custom_components.mpchc.state import PlaybackState, PlayerState
+
+START = datetime(2024, 1, 1, 20, 0, tzinfo=timezone.utc)
+PLAYING = PlayerState(state=PlaybackState.PLAYING, filepath="D:\\Movies\\Movie.mkv", position=0, duration=7200000, rate=1.0)
+
+
+def _poll(clock: PlaybackClock, seconds: float, rate: float) -> bool:
+    """Sync the clock with a player at the position reached after seconds at rate."""
+    return clock.sync(replace(PLAYING, position=int(seconds * rate * 1000), rate=rate), START + timedelta(seconds=seconds))
+
+
+def test_polls_in_step_keep_the_anchor() -> None:
+    """At normal speed a poll agreeing with the extrapolation doesn't re-anchor the clock."""
+    clock = PlaybackClock()
+    assert _poll(clock, 0, 1.0)
+    assert not _poll(clock, 5, 1.0)
+    assert clock.updated_at == START
+    assert not _poll(clock, 10.5, 1.0)
+    # A second of drift re-anchors
+    clock.sync(replace(PLAYING, position=13000), START + timedelta(seconds=11))
+    assert clock.position == 13000
+
+
+def test_anchor_refreshed_at_another_rate() -> None:
+    """The published anchor is extrapolated at 1x : it is refreshed on every poll at another rate."""
+    clock = PlaybackClock()
+    _poll(clock, 0, 2.0)
+    for seconds in range(5, 65, 5):
+        assert _poll(clock, seconds, 2.0)
+        # What the frontend shows from the anchor matches the player
+        assert clock.position == seconds * 2000
+        assert clock.updated_at == START + timedelta(seconds=seconds)
+    assert clock.position_at(START + timedelta(seconds=62)) == 124000
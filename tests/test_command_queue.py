@@ -0,0 +1,107 @@
+"""Tests of the command queue shared by the commands and the state reads."""
+from __future__ import annotations
+
+import asyncio
+
+from custom_components.mpchc.command_queue import CommandQueue, CommandStep, compile_steps, schedule_steps
+
+PLAY = CommandStep("887")
+VOLUME_UP = CommandStep("907")
+STOP = CommandStep("890")
+
+
+class Player:
+    """Record the requests of a queue, each one taking the given time."""
+
+    def __init__(self, latency: float = 0.0, read_latency: float | None = None):
+        self.latency = latency
+        self.read_latency = latency if read_latency is None else read_latency
+        self.log: list[str] = []
+
+    async def send(self, step: CommandStep) -> None:
+        self.log.append(f"start {step.command_id}")
+        await asyncio.sleep(self.latency)
+        self.log.append(f"sent {step.command_id}")
+
+    def fetch(self, name: str):
+        async def fetch() -> str:
+            self.log.append(f"read {name}")
+            await asyncio.sleep(self.read_latency)
+            return name
+        return fetch
+
+
+async def test_read_waits_for_the_command_in_flight() -> None:
+    """A read queued while a command is sent reflects it."""
+    player = Player(0.05)
+    queue = CommandQueue(player.send)
+    command = asyncio.ensure_future(queue.async_run([PLAY]))
+    await asyncio.sleep(0)
+    assert await queue.async_read("variables", player.fetch("variables")) == "variables"
+    await command
+    assert player.log == ["start 887", "sent 887", "read variables"]
+
+
+async def test_read_does_not_wait_for_the_delays_of_a_sequence() -> None:
+    """A read runs between the steps of a slow sequence."""
+    player = Player()
+    queue = CommandQueue(player.send)
+    sequence = asyncio.ensure_future(queue.async_run([VOLUME_UP] * 3, delay_secs=0.2))
+    await asyncio.sleep(0.05)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await queue.async_read("status", player.fetch("status"))
+    assert loop.time() - start < 0.1
+    await sequence
+    assert player.log == ["start 907", "sent 907", "read status", "start 907", "sent 907", "start 907", "sent 907"]
+
+
+async def test_command_does_not_wait_for_a_read() -> None:
+    """A command is sent while a read is in flight."""
+    player = Player(0.01, read_latency=0.2)
+    queue = CommandQueue(player.send)
+    read = asyncio.ensure_future(queue.async_read("variables", player.fetch("variables")))
+    await asyncio.sleep(0.01)
+    await queue.async_run([PLAY])
+    assert not read.done()
+    await read
+    assert player.log == ["read variables", "start 887", "sent 887"]
+
+
+async def test_sequences_do_not_interleave() -> None:
+    """A sequence starts after the previous one, even when its caller gave up waiting."""
+    player = Player(0.01)
+    queue = CommandQueue(player.send)
+    first = asyncio.ensure_future(queue.async_run([VOLUME_UP] * 2, delay_secs=0.05))
+    await asyncio.sleep(0)
+    cancelled = asyncio.ensure_future(queue.async_run([CommandStep("908")]))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    await queue.async_run([PLAY])
+    await first
+    assert player.log == ["start 907", "sent 907", "start 907", "sent 907", "start 887", "sent 887"]
+    assert queue.pending == 0
+
+
+async def test_concurrent_reads_share_a_request() -> None:
+    """Reads of the same page share a request until a command is sent."""
+    player = Player(0.01)
+    queue = CommandQueue(player.send)
+    reads = await asyncio.gather(*(queue.async_read("status", player.fetch("status")) for _ in range(3)))
+    assert reads == ["status"] * 3
+    assert player.log == ["read status"]
+
+
+def test_compile_steps() -> None:
+    """Without delay duplicates of an idempotent command are sent once, the others together."""
+    steps = [PLAY, PLAY, VOLUME_UP, VOLUME_UP, VOLUME_UP, STOP, PLAY]
+    assert compile_steps(steps, 0) == [[PLAY], [VOLUME_UP] * 3, [STOP], [PLAY]]
+    assert compile_steps(steps, 0.5) == [[step] for step in steps]
+
+
+def test_schedule_steps() -> None:
+    """Batches start every delay from the beginning of the sequence."""
+    assert schedule_steps([PLAY, VOLUME_UP, VOLUME_UP], 0.5) == [(0, [PLAY]), (0.5, [VOLUME_UP]), (1.0, [VOLUME_UP])]
+    assert schedule_steps([PLAY, VOLUME_UP, VOLUME_UP], -1) == [(0, [PLAY]), (0, [VOLUME_UP, VOLUME_UP])]
+    # Repeats keep their slot : the last step starts after four delays
+    assert schedule_steps([VOLUME_UP, PLAY, PLAY, PLAY, VOLUME_UP], 0.4)[-1] == (1.6, [VOLUME_UP])
@@ -0,0 +1,54 @@
+"""Tests of the command registry and the remote macros."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.mpchc.command_queue import CommandStep
+from custom_components.mpchc.commands import COMMANDS, MacroError, UnknownCommandError, compile_macros
+
+
+def test_registry_names_and_ids() -> None:
+    """Command names map to their ids, unknown numeric ids are passed through."""
+    assert COMMANDS.id("PLAY") == "887"
+    assert COMMANDS.name("887") == "PLAY"
+    assert COMMANDS.id("32781") == "32781"
+    with pytest.raises(UnknownCommandError):
+        COMMANDS.id("PLAYY")
+
+
+def test_macro_schedule() -> None:
+    """Commands between waits are sent together, waits move the next batches."""
+    macros = compile_macros(
+        "# Comment\n"
+        "Movie night: VIEW_FULLSCREEN, wait 1.5, PLAY, VOLUME_UP, VOLUME_UP\n"
+        "\n"
+        "Mute: VOLUME_MUTE\n"
+    )
+    assert list(macros) == ["Movie night", "Mute"]
+    fullscreen, play, volume_up = (COMMANDS.step(name) for name in ("VIEW_FULLSCREEN", "PLAY", "VOLUME_UP"))
+    assert macros["Movie night"].schedule == (
+        (0.0, (fullscreen,)),
+        (1.5, (play,)),
+        (1.5, (volume_up, volume_up)),
+    )
+    assert macros["Mute"].steps == (CommandStep("909"),)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "Typo: PLAYY",
+        "No name PLAY",
+        ": PLAY",
+        "Empty: PLAY, , STOP",
+        "Waits only: wait 1",
+        "Trailing wait: PLAY, wait 5",
+        "Bad wait: PLAY, wait soon, STOP",
+        "Long wait: PLAY, wait 61, STOP",
+        "Twice: PLAY\nTwice: STOP",
+    ],
+)
+def test_invalid_macros(text: str) -> None:
+    """Mistakes are reported when the options are saved, not when the macro runs."""
+    with pytest.raises(MacroError):
+        compile_macros(text)
@@ -0,0 +1,70 @@
+"""Tests of the config and options flows."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from homeassistant import config_entries
+from homeassistant.const import CONF_HOST, CONF_NAME, CONF_PORT
+from homeassistant.data_entry_flow import FlowResultType
+
+from custom_components.mpchc.const import CONF_MACROS, DEFAULT_NAME, DEFAULT_PORT, DOMAIN
+
+
+async def test_user_step(hass, simulator) -> None:
+    """A player reached on the given host and port is added."""
+    with patch("custom_components.mpchc.config_flow.MPCHCFlowHandler._async_discover", return_value={}):
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    assert result["type"] is FlowResultType.FORM
+    assert result["step_id"] == "user"
+
+    with patch("custom_components.mpchc.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_NAME: DEFAULT_NAME, CONF_HOST: "127.0.0.1", CONF_PORT: simulator.port}
+        )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["data"] == {CONF_NAME: DEFAULT_NAME, CONF_HOST: "http://127.0.0.1", CONF_PORT: simulator.port}
+
+
+async def test_user_step_unreachable(hass, simulator) -> None:
+    """An unreachable player is reported on the form."""
+    port = simulator.port
+    await simulator.close()
+    with patch("custom_components.mpchc.config_flow.MPCHCFlowHandler._async_discover", return_value={}):
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_NAME: DEFAULT_NAME, CONF_HOST: "127.0.0.1", CONF_PORT: port}
+    )
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {"base": "timeout_error"}
+
+
+async def test_pick_discovered_player(hass) -> None:
+    """A player found on the network is added from the pick list."""
+    with patch(
+        "custom_components.mpchc.config_flow.MPCHCFlowHandler._async_discover",
+        return_value={"192.168.1.20": "192.168.1.20 (Movie.mkv)"},
+    ):
+        result = await hass.config_entries.flow.async_init(DOMAIN, context={"source": config_entries.SOURCE_USER})
+    assert result["step_id"] == "pick"
+
+    with patch("custom_components.mpchc.async_setup_entry", return_value=True):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_NAME: DEFAULT_NAME, CONF_HOST: "192.168.1.20"}
+        )
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert result["data"] == {CONF_NAME: DEFAULT_NAME, CONF_HOST: "http://192.168.1.20", CONF_PORT: DEFAULT_PORT}
+
+
+async def test_options_reject_invalid_macros(hass, config_entry) -> None:
+    """Macros are compiled before they are saved."""
+    result = await hass.config_entries.options.async_init(config_entry.entry_id)
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {CONF_MACROS: "Typo: PLAYY"})
+    assert result["type"] is FlowResultType.FORM
+    assert result["errors"] == {CONF_MACROS: "invalid_macro"}
+    assert "PLAYY" in result["description_placeholders"]["error"]
+
+    result = await hass.config_entries.options.async_configure(result["flow_id"], {CONF_MACROS: "Mute: VOLUME_MUTE"})
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert config_entry.options == {CONF_MACROS: "Mute: VOLUME_MUTE"}
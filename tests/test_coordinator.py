@@ -0,0 +1,172 @@
+"""Tests of the polling coordinator against the simulated player."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+from custom_components.mpchc.commands import COMMANDS
+from custom_components.mpchc.const import COMMAND_MUTE, COMMAND_PLAY, COMMAND_SEEK, COMMAND_VOLUME
+from custom_components.mpchc.state import PlaybackState
+
+from .conftest import sent
+
+
+def _reads(coordinator, kind: str) -> int:
+    histogram = coordinator.client.stats.latency.get(kind)
+    return histogram.count if histogram is not None else 0
+
+
+async def test_status_polls_between_variables_polls(coordinator, player) -> None:
+    """Routine polls read status.html, a new file reads variables.html again."""
+    await coordinator.async_refresh()
+    assert coordinator.data.state is PlaybackState.PAUSED
+    assert (_reads(coordinator, "variables"), _reads(coordinator, "status")) == (1, 0)
+
+    # The first status.html poll learns how it reports the file from variables.html
+    await coordinator.async_refresh()
+    assert (_reads(coordinator, "variables"), _reads(coordinator, "status")) == (2, 1)
+
+    player.volume = 30
+    await coordinator.async_refresh()
+    assert coordinator.data.volume == 30
+    assert coordinator.data.filepath == player.filepath
+    assert (_reads(coordinator, "variables"), _reads(coordinator, "status")) == (2, 2)
+
+    player.open("D:\\Movies\\Other.mkv")
+    await coordinator.async_refresh()
+    assert coordinator.data.state is PlaybackState.PLAYING
+    assert coordinator.data.filepath == "D:\\Movies\\Other.mkv"
+    assert (_reads(coordinator, "variables"), _reads(coordinator, "status")) == (3, 3)
+
+
+async def test_polling_intervals(coordinator, player, simulator, monkeypatch) -> None:
+    """A player answering without a state is backed off, an unreachable one is polled often."""
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    assert timedelta(seconds=18) <= coordinator.update_interval <= timedelta(seconds=22)
+
+    monkeypatch.setattr(player, "variables_html", lambda: "<html></html>")
+    monkeypatch.setattr(player, "status_html", lambda: "<html></html>")
+    await coordinator.async_refresh()
+    assert coordinator.data.state is None
+    assert timedelta(seconds=54) <= coordinator.update_interval <= timedelta(seconds=66)
+
+    await simulator.close()
+    await coordinator.async_refresh()
+    assert timedelta(seconds=4.5) <= coordinator.update_interval <= timedelta(seconds=5.5)
+
+
+async def test_unreachable_player(coordinator, simulator) -> None:
+    """A failed poll reports no state and forgets the playback clock."""
+    await coordinator.async_refresh()
+    assert coordinator.clock.position is not None
+    await simulator.close()
+    await coordinator.async_refresh()
+    assert not coordinator.last_update_success
+    assert coordinator.player_state is None
+    assert coordinator.clock.position is None
+
+
+async def test_optimistic_command_confirmed(coordinator, player) -> None:
+    """A command shows its effect at once, the poll after it confirms it."""
+    await coordinator.async_refresh()
+    coordinator.async_apply_command(COMMAND_PLAY)
+    assert coordinator.player_state.state is PlaybackState.PLAYING
+    assert coordinator.data.state is PlaybackState.PAUSED
+    assert coordinator.clock.playing
+
+    await coordinator.client.async_send_command(COMMAND_PLAY)
+    coordinator.async_command_sent()
+    await coordinator.async_refresh()
+    assert coordinator.data.state is PlaybackState.PLAYING
+    assert coordinator.player_state is coordinator.data
+
+
+async def test_optimistic_command_rolled_back(coordinator, player) -> None:
+    """The poll after a command ignored by the player rolls its effect back."""
+    await coordinator.async_refresh()
+    coordinator.async_apply_command(COMMAND_PLAY)
+    coordinator.async_command_sent()
+    await coordinator.async_refresh()
+    assert coordinator.player_state.state is PlaybackState.PAUSED
+    assert not coordinator.clock.playing
+
+
+async def test_poll_started_before_the_command(hass, coordinator, player, simulator_options) -> None:
+    """A poll started before the command keeps its optimistic effect."""
+    await coordinator.async_refresh()
+    simulator_options.latency = 0.2
+    poll = hass.async_create_task(coordinator.async_refresh())
+    await asyncio.sleep(0.05)
+    coordinator.async_apply_command(COMMAND_MUTE)
+    await poll
+    assert coordinator.player_state.muted
+    assert not coordinator.data.muted
+
+
+async def test_command_queued_behind_a_sequence(hass, coordinator, player) -> None:
+    """A poll made while a command waits for a sequence keeps its optimistic effect."""
+    await coordinator.async_refresh()
+    volume_up = COMMANDS.step("VOLUME_UP")
+    sequence = hass.async_create_task(coordinator.client.async_send_commands([volume_up, volume_up], 0.3))
+    await asyncio.sleep(0.05)
+
+    async def mute() -> None:
+        coordinator.async_apply_command(COMMAND_MUTE)
+        await coordinator.client.async_send_command(COMMAND_MUTE)
+        coordinator.async_command_sent()
+
+    command = hass.async_create_task(mute())
+    await asyncio.sleep(0)
+    await coordinator.async_refresh()
+    assert not coordinator.data.muted
+    assert coordinator.player_state.muted
+
+    await command
+    await sequence
+    await coordinator.async_refresh()
+    assert coordinator.data.muted
+    assert coordinator.player_state is coordinator.data
+
+
+async def test_rollback_of_an_unsent_command(coordinator, player) -> None:
+    """A command that could not be sent is rolled back with the playback clock."""
+    await coordinator.async_refresh()
+    position = coordinator.clock.position
+    coordinator.async_apply_command(COMMAND_SEEK, position=600)
+    coordinator.async_apply_command(COMMAND_MUTE)
+    assert coordinator.clock.position == 600000
+    assert coordinator.player_state.muted
+    coordinator.async_rollback()
+    assert coordinator.clock.position == position
+    assert not coordinator.player_state.muted
+
+
+async def test_seek_sent_after_the_seek_in_flight(hass, coordinator, player, simulator_options) -> None:
+    """Seeks made while a seek is in flight are coalesced into their latest target."""
+    await coordinator.async_refresh()
+    simulator_options.latency = 0.2
+    first = hass.async_create_task(coordinator.async_seek(10))
+    await asyncio.sleep(0.05)
+    await coordinator.async_seek(20)
+    await coordinator.async_seek(30)
+    await first
+
+    assert [params["position"] for params in sent(player, COMMAND_SEEK)] == ["0:00:10", "0:00:30"]
+    assert player.position == 30000
+    assert coordinator.clock.position == 30000
+
+
+async def test_volume_sent_after_the_volume_in_flight(hass, coordinator, player, simulator_options) -> None:
+    """Volume changes made while a volume request is in flight are coalesced into the latest level."""
+    await coordinator.async_refresh()
+    simulator_options.latency = 0.2
+    first = hass.async_create_task(coordinator.async_set_volume(10))
+    await asyncio.sleep(0.05)
+    await coordinator.async_set_volume(20)
+    await coordinator.async_set_volume(30)
+    await first
+
+    assert [params["volume"] for params in sent(player, COMMAND_VOLUME)] == ["10", "30"]
+    assert player.volume == 30
+    assert coordinator.player_state.volume == 30
@@ -0,0 +1,109 @@
+"""Tests of the bus events fired from the polls."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import async_capture_events, async_fire_time_changed
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.mpchc.client import MpcHcConnectionError
+from custom_components.mpchc.const import (
+    COMMAND_SPEED_UP,
+    EVENT_FILE_CHANGED,
+    EVENT_POSITION_REACHED,
+    EVENT_STATE_CHANGED,
+)
+
+
+async def test_outage_only_changes_the_availability(hass, coordinator, player) -> None:
+    """An unreachable player fires its availability, not a file change."""
+    state_changed = async_capture_events(hass, EVENT_STATE_CHANGED)
+    file_changed = async_capture_events(hass, EVENT_FILE_CHANGED)
+    await coordinator.async_refresh()
+
+    error = MpcHcConnectionError("unreachable")
+    with patch.object(coordinator.client, "async_get_status", side_effect=error), \
+            patch.object(coordinator.client, "async_get_variables", side_effect=error):
+        await coordinator.async_refresh()
+        await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [event.data["changes"] for event in state_changed] == [{"available": [True, False]}]
+
+    player.volume = 10
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert state_changed[-1].data["changes"] == {"available": [False, True], "volume": [80, 10]}
+    assert file_changed == []
+
+
+async def test_file_change_fired_once(hass, coordinator, player) -> None:
+    """Opening another file fires the previous and the new path."""
+    file_changed = async_capture_events(hass, EVENT_FILE_CHANGED)
+    await coordinator.async_refresh()
+    previous = player.filepath
+    player.open("D:\\Movies\\Other.mkv")
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [(event.data["previous_filepath"], event.data["filepath"]) for event in file_changed] == [
+        (previous, "D:\\Movies\\Other.mkv")
+    ]
+
+
+async def _async_tick(hass, freezer, seconds: float) -> None:
+    freezer.tick(seconds)
+    async_fire_time_changed(hass, dt_util.utcnow())
+    await hass.async_block_till_done()
+
+
+async def test_thresholds_fired_once_from_the_timer(hass, coordinator, player, freezer) -> None:
+    """Each threshold fires once when due, the delay following the playback rate."""
+    reached = async_capture_events(hass, EVENT_POSITION_REACHED)
+    player.command("887", {})
+    player.command("-1", {"position": "0:59:50"})
+    await coordinator.async_refresh()
+
+    await _async_tick(hass, freezer, 5)
+    assert reached == []
+    await _async_tick(hass, freezer, 5)
+    assert [event.data["threshold"] for event in reached] == [0.5]
+
+    await coordinator.async_refresh()
+    await _async_tick(hass, freezer, 5)
+    assert len(reached) == 1
+
+    # 0.9 is 2875 s of playback away, 1437.5 s at 2x
+    coordinator.async_apply_command(COMMAND_SPEED_UP)
+    await coordinator.client.async_send_command(COMMAND_SPEED_UP)
+    coordinator.async_command_sent()
+    await coordinator.async_refresh()
+    assert coordinator.clock.rate == 2
+    await _async_tick(hass, freezer, 1430)
+    assert len(reached) == 1
+    await _async_tick(hass, freezer, 10)
+    assert [event.data["threshold"] for event in reached] == [0.5, 0.9]
+
+    await coordinator.async_refresh()
+    await _async_tick(hass, freezer, 60)
+    assert len(reached) == 2
+
+
+async def test_threshold_not_fired_again_after_a_seek(hass, coordinator, player, freezer) -> None:
+    """A threshold skipped by a seek fires at once, and not again when passed back."""
+    reached = async_capture_events(hass, EVENT_POSITION_REACHED)
+    player.command("887", {})
+    player.command("-1", {"position": "0:10:00"})
+    await coordinator.async_refresh()
+
+    player.command("-1", {"position": "1:00:30"})
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert [event.data["threshold"] for event in reached] == [0.5]
+
+    player.command("-1", {"position": "0:59:00"})
+    await coordinator.async_refresh()
+    await _async_tick(hass, freezer, 90)
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+    assert len(reached) == 1
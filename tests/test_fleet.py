@@ -0,0 +1,33 @@
+"""Tests of the poll scheduling shared by the players."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from custom_components.mpchc import fleet
+from custom_components.mpchc.const import FLEET_POLL_RATE_WINDOW
+from custom_components.mpchc.fleet import FleetPoller
+
+INTERVAL = timedelta(seconds=5)
+
+
+async def test_poll_history_is_bounded(monkeypatch) -> None:
+    """Polls older than the rate window are forgotten as new ones are counted."""
+    now = 1000.0
+    monkeypatch.setattr(fleet, "monotonic", lambda: now)
+    poller = FleetPoller()
+    for _ in range(10_000):
+        now += 0.1
+        async with poller.async_poll():
+            pass
+    window = FLEET_POLL_RATE_WINDOW.total_seconds()
+    assert len(poller._polls) <= window / 0.1 + 1
+    assert poller.poll_rate == len(poller._polls) / window
+
+
+def test_first_intervals_span_the_interval() -> None:
+    """The first polls are spread over a whole interval, the next ones only jittered."""
+    poller = FleetPoller(jitter=0.1)
+    phases = [poller.phased(INTERVAL) for _ in range(1000)]
+    assert all(INTERVAL * 0.1 <= phase <= INTERVAL * 1.1 for phase in phases)
+    assert max(phases) - min(phases) > INTERVAL * 0.9
+    assert all(INTERVAL * 0.9 <= poller.jittered(INTERVAL) <= INTERVAL * 1.1 for _ in range(1000))
@@ -0,0 +1,26 @@
+"""Tests of the setup of the integration against the simulated player."""
+from __future__ import annotations
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.helpers import entity_registry as er
+
+from .conftest import async_setup_players
+
+
+async def test_setup_and_unload(hass, config_entry) -> None:
+    """The entities of a player are set up from its config entry and unloaded with it."""
+    registry = er.async_get(hass)
+    (latency,) = await async_setup_players(hass, config_entry)
+    assert config_entry.state is ConfigEntryState.LOADED
+
+    sensors = [
+        entry for entry in er.async_entries_for_config_entry(registry, config_entry.entry_id)
+        if entry.domain == "sensor"
+    ]
+    assert len(sensors) == 6
+    assert all(entry.unique_id.startswith(f"{config_entry.entry_id}_") for entry in sensors)
+    assert hass.states.get(latency.entity_id) is not None
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert config_entry.state is ConfigEntryState.NOT_LOADED
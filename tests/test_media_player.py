@@ -0,0 +1,83 @@
+"""Tests of the media player entity."""
+from __future__ import annotations
+
+import pytest
+
+from homeassistant.components.media_player import (
+    ATTR_MEDIA_DURATION,
+    ATTR_MEDIA_POSITION,
+    ATTR_MEDIA_POSITION_UPDATED_AT,
+    ATTR_MEDIA_SEEK_POSITION,
+    ATTR_MEDIA_VOLUME_LEVEL,
+    DOMAIN as MEDIA_PLAYER_DOMAIN,
+    SERVICE_MEDIA_SEEK,
+    SERVICE_VOLUME_SET,
+    MediaPlayerState,
+)
+from homeassistant.const import ATTR_ENTITY_ID, SERVICE_MEDIA_PLAY
+from homeassistant.core import State
+from homeassistant.util import dt as dt_util
+
+from custom_components.mpchc.const import COMMAND_SEEK, COMMAND_VOLUME
+from custom_components.mpchc.media_player import MpcHcDevice
+
+from .conftest import FILEPATH, async_setup_players, entity_id, sent
+
+UPDATED_AT = "2024-01-01T20:00:00+00:00"
+
+
+def _last_state(state: MediaPlayerState) -> State:
+    return State(
+        "media_player.mpc_hc",
+        state,
+        {ATTR_MEDIA_DURATION: 7200, ATTR_MEDIA_POSITION: 600, ATTR_MEDIA_POSITION_UPDATED_AT: UPDATED_AT},
+    )
+
+
+@pytest.mark.parametrize("state", [MediaPlayerState.PAUSED, MediaPlayerState.IDLE])
+async def test_restore_still_position(coordinator, config_entry, state) -> None:
+    """The position of a still player is restored with its update time."""
+    device = MpcHcDevice(coordinator, config_entry)
+    device._restore_state(_last_state(state))
+    assert device.state is state
+    assert device.media_position == 600
+    assert device.media_position_updated_at == dt_util.parse_datetime(UPDATED_AT)
+
+
+async def test_restore_playing_without_position(coordinator, config_entry) -> None:
+    """The position of a playing player is not restored, the frontend would move it across the downtime."""
+    device = MpcHcDevice(coordinator, config_entry)
+    device._restore_state(_last_state(MediaPlayerState.PLAYING))
+    assert device.state is MediaPlayerState.PLAYING
+    assert device.media_duration == 7200
+    assert device.media_position is None
+    assert device.media_position_updated_at is None
+
+
+async def test_services(hass, config_entry, player) -> None:
+    """The services send their commands to the player and show their effect at once."""
+    await async_setup_players(hass, config_entry)
+    player_id = entity_id(hass, config_entry, MEDIA_PLAYER_DOMAIN)
+    state = hass.states.get(player_id)
+    assert state.state == MediaPlayerState.PAUSED
+    assert state.attributes[ATTR_MEDIA_DURATION] == 7200
+
+    await hass.services.async_call(MEDIA_PLAYER_DOMAIN, SERVICE_MEDIA_PLAY, {ATTR_ENTITY_ID: player_id}, blocking=True)
+    assert ("887", {}) in player.commands
+    assert hass.states.get(player_id).state == MediaPlayerState.PLAYING
+
+    await hass.services.async_call(
+        MEDIA_PLAYER_DOMAIN, SERVICE_MEDIA_SEEK, {ATTR_ENTITY_ID: player_id, ATTR_MEDIA_SEEK_POSITION: 600}, blocking=True
+    )
+    await hass.services.async_call(
+        MEDIA_PLAYER_DOMAIN, SERVICE_VOLUME_SET, {ATTR_ENTITY_ID: player_id, ATTR_MEDIA_VOLUME_LEVEL: 0.3}, blocking=True
+    )
+    assert sent(player, COMMAND_SEEK) == [{"position": "0:10:00"}]
+    assert sent(player, COMMAND_VOLUME) == [{"volume": "30"}]
+    state = hass.states.get(player_id)
+    assert state.attributes[ATTR_MEDIA_POSITION] == 600
+    assert state.attributes[ATTR_MEDIA_VOLUME_LEVEL] == 0.3
+    assert player.filepath == FILEPATH
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
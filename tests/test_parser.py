@@ -0,0 +1,82 @@
+"""Tests of the variables.html and status.html parsers."""
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from benchmarks.simulator import STATE_CLOSED, SimulatedPlayer
+from custom_components.mpchc.parser import VariablesParser, parse_status, parse_variables
+from custom_components.mpchc.state import PlaybackState, PlayerState
+
+from .conftest import DURATION
+
+SAMPLES = Path(__file__).parent.parent / "benchmarks" / "samples"
+
+
+def _sample(name: str) -> bytes:
+    return (SAMPLES / f"variables_{name}.html").read_bytes()
+
+
+def test_parse_variables() -> None:
+    """The known variables are extracted with their original case."""
+    variables = parse_variables(_sample("paused"))
+    assert variables["filepath"] == "E:\\Series\\Show\\Season 1\\S01E04 - The Pilot.mp4"
+    assert variables["state"] == "1"
+    assert variables["positionstring"] == "00:30:34"
+    state = PlayerState.from_variables(variables)
+    assert state.state is PlaybackState.PAUSED
+    assert (state.position, state.duration, state.volume, state.muted) == (1834211, 2641000, 35, True)
+
+
+def test_parse_unicode_and_entities() -> None:
+    """Values are decoded as UTF-8 and unescaped."""
+    variables = parse_variables(_sample("unicode"))
+    assert variables["file"] == "Amélie & Nino – Le Fabuleux Destin.mkv"
+    assert variables["filedir"] == "C:\\Users\\Public\\Vidéos"
+    assert variables["playbackrate"] == "1.5"
+
+
+def test_parse_closed_player() -> None:
+    """Empty values are reported as missing."""
+    variables = parse_variables(_sample("closed"))
+    assert "file" not in variables
+    assert "statestring" not in variables
+    state = PlayerState.from_variables(variables)
+    assert state.state is PlaybackState.CLOSED
+    assert state.filepath is None
+
+
+@pytest.mark.parametrize("name", ["playing", "paused", "closed", "unicode"])
+@pytest.mark.parametrize("size", [1, 7, 64])
+def test_parse_in_chunks(name: str, size: int) -> None:
+    """Feeding the page in chunks, splitting tags and characters, gives the same variables."""
+    data = _sample(name)
+    parser = VariablesParser()
+    for start in range(0, len(data), size):
+        parser.feed(data[start:start + size])
+    assert parser.result() == parse_variables(data)
+
+
+def test_parse_status() -> None:
+    """status.html reports the frequently changing variables and the escaped path."""
+    player = SimulatedPlayer('D:\\Movies\\"Quoted".mkv', DURATION, state=1)
+    status = parse_status(player.status_html().encode())
+    assert status == {
+        "statestring": "Paused",
+        "position": "0",
+        "positionstring": "00:00:00",
+        "duration": str(DURATION),
+        "durationstring": "02:00:00",
+        "muted": "0",
+        "volumelevel": "80",
+        "statusfile": 'D:\\\\Movies\\\\\\"Quoted\\".mkv',
+    }
+
+
+def test_parse_status_closed_and_invalid() -> None:
+    """A closed player reports an empty path, another page is not a status."""
+    player = SimulatedPlayer("D:\\Movies\\Movie.mkv", DURATION, state=STATE_CLOSED)
+    assert parse_status(player.status_html().encode())["statusfile"] == ""
+    assert parse_status(_sample("playing")) is None
+    assert parse_status(b"") is None
@@ -0,0 +1,53 @@
+"""Tests of the replay of the traffic recordings."""
+from __future__ import annotations
+
+import json
+
+from benchmarks import replay
+from benchmarks.simulator import STATE_PLAYING, SimulatedPlayer
+
+from .conftest import DURATION, FILEPATH
+
+
+def _replay(tmp_path, records: list[dict]) -> replay.Replay:
+    path = tmp_path / "recording.jsonl"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+    result = replay.Replay(print_events=False)
+    for record in replay.recorder.read_recording(str(path)):
+        result.feed(record)
+    return result
+
+
+def test_replay_merges_status_like_the_coordinator(tmp_path) -> None:
+    """status.html records update the state once a variables.html record gave the file."""
+    player = SimulatedPlayer(FILEPATH, DURATION, state=STATE_PLAYING)
+    records = [
+        {"t": 1.0, "kind": "variables", "body": player.variables_html()},
+        {"t": 2.0, "kind": "status", "body": player.status_html()},
+        {"t": 2.1, "kind": "variables", "body": player.variables_html()},
+    ]
+    player.volume = 20
+    records.append({"t": 3.0, "kind": "status", "body": player.status_html()})
+    result = _replay(tmp_path, records)
+    assert result.state.volume == 20
+    assert result.changes == 1
+    assert result.bad_pages == 0
+
+
+def test_replay_ignores_errors_of_other_requests(tmp_path) -> None:
+    """Only the failed polls make the player unavailable."""
+    player = SimulatedPlayer(FILEPATH, DURATION, state=STATE_PLAYING)
+    records = [
+        {"t": 1.0, "kind": "variables", "body": player.variables_html()},
+        {"t": 2.0, "kind": "error", "body": "snapshot: ServerTimeoutError()"},
+        {"t": 3.0, "kind": "error", "body": "command: ClientConnectorError()"},
+    ]
+    result = _replay(tmp_path, records)
+    assert result.state.filepath == FILEPATH
+    assert result.changes == 0
+
+    records.append({"t": 4.0, "kind": "error", "body": "status: ServerTimeoutError()"})
+    result = _replay(tmp_path, records)
+    assert result.tracker.available is False
+    assert result.state.filepath == FILEPATH
+    assert result.changes == 1
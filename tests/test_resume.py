@@ -0,0 +1,133 @@
+"""Tests of the resume index and of the resume of a file on the simulated player."""
+from __future__ import annotations
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.util import dt as dt_util
+
+from custom_components.mpchc import coordinator as coordinator_module
+from custom_components.mpchc.client import MpcHcConnectionError
+from custom_components.mpchc.const import COMMAND_SEEK, DOMAIN, SERVICE_RESUME
+from custom_components.mpchc.resume import ResumeIndex
+from custom_components.mpchc.state import PlaybackState, PlayerState
+
+from .conftest import DURATION, FILEPATH, async_setup_players, entity_id, sent
+
+OTHER = "D:\\Movies\\Other.mkv"
+
+
+def _playing(path: str, seconds: float, state: PlaybackState = PlaybackState.PLAYING) -> PlayerState:
+    return PlayerState(state=state, filepath=path, position=int(seconds * 1000), duration=DURATION)
+
+
+def _storage_key(config_entry) -> str:
+    return f"{DOMAIN}.resume.{config_entry.entry_id}"
+
+
+async def test_positions_recorded(hass, config_entry) -> None:
+    """Positions are saved while playing or paused, not at the start, and forgotten at the end."""
+    index = ResumeIndex(hass, config_entry)
+    index.async_update(_playing(FILEPATH, 5))
+    assert index.position(FILEPATH) is None
+    index.async_update(_playing(FILEPATH, 600))
+    index.async_update(_playing(FILEPATH, 630, PlaybackState.PAUSED))
+    index.async_update(_playing(FILEPATH, 0, PlaybackState.STOPPED))
+    # Windows paths are case insensitive
+    assert index.position(FILEPATH.upper()) == 630
+    # Just reopened, before the resume seek : the saved position is kept
+    index.async_update(_playing(FILEPATH, 2))
+    assert index.position(FILEPATH) == 630
+
+    index.async_update(_playing(FILEPATH, DURATION / 1000 * 0.96))
+    assert index.position(FILEPATH) is None
+    assert len(index) == 0
+
+
+async def test_least_recent_evicted(hass, config_entry) -> None:
+    """The index keeps the files played last."""
+    index = ResumeIndex(hass, config_entry, max_files=2)
+    index.async_update(_playing("D:\\a.mkv", 60))
+    index.async_update(_playing("D:\\b.mkv", 60))
+    index.async_update(_playing("D:\\a.mkv", 120))
+    index.async_update(_playing("D:\\c.mkv", 60))
+    assert index.position("D:\\b.mkv") is None
+    assert index.position("D:\\a.mkv") == 120
+    assert index.last() == ("D:\\c.mkv", 60)
+
+
+async def test_single_delayed_save(hass, hass_storage, config_entry) -> None:
+    """A burst of polls is written once after the save delay, unload writes at once."""
+    index = ResumeIndex(hass, config_entry)
+    with patch.object(index._store, "async_delay_save", wraps=index._store.async_delay_save) as delay_save:
+        for seconds in range(60, 120, 5):
+            index.async_update(_playing(FILEPATH, seconds))
+    assert delay_save.call_count == 1
+    assert _storage_key(config_entry) not in hass_storage
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=61))
+    await hass.async_block_till_done()
+    assert hass_storage[_storage_key(config_entry)]["data"] == {"files": [[FILEPATH, 115, DURATION // 1000]]}
+
+    index.async_update(_playing(FILEPATH, 200))
+    await index.async_flush()
+    assert hass_storage[_storage_key(config_entry)]["data"] == {"files": [[FILEPATH, 200, DURATION // 1000]]}
+
+    loaded = ResumeIndex(hass, config_entry)
+    await loaded.async_load()
+    assert loaded.last() == (FILEPATH, 200)
+
+
+async def test_resume_opens_and_seeks(coordinator, player) -> None:
+    """The file is opened from the browser page, then seeked to once the player reports it."""
+    await coordinator.async_refresh()
+    assert await coordinator.async_resume(OTHER, 600) == 600
+    assert player.filepath == OTHER
+    assert sent(player, COMMAND_SEEK) == [{"position": "0:10:00"}]
+    assert player.position >= 600000
+    assert coordinator.clock.position_at(dt_util.utcnow()) >= 600000
+
+
+async def test_resume_saved_position(coordinator, player) -> None:
+    """Without a position the saved one is used, a file never played starts over."""
+    coordinator.resume.async_update(_playing(OTHER, 90))
+    assert await coordinator.async_resume(OTHER) == 90
+    assert sent(player, COMMAND_SEEK) == [{"position": "0:01:30"}]
+
+    assert await coordinator.async_resume("D:\\Movies\\New.mkv") is None
+    assert player.filepath == "D:\\Movies\\New.mkv"
+    assert len(sent(player, COMMAND_SEEK)) == 1
+
+
+async def test_resume_file_not_opened(coordinator, player, monkeypatch) -> None:
+    """A file the player doesn't open is reported without seeking the current file."""
+    await coordinator.async_refresh()
+    monkeypatch.setattr(player, "open", lambda filepath: None)
+    monkeypatch.setattr(coordinator_module, "RESUME_OPEN_TIMEOUT", timedelta(seconds=0.3))
+    with pytest.raises(MpcHcConnectionError):
+        await coordinator.async_resume(OTHER, 600)
+    assert sent(player, COMMAND_SEEK) == []
+    assert player.filepath == FILEPATH
+
+
+async def test_resume_service_persisted(hass, hass_storage, config_entry, player) -> None:
+    """The resume service opens the file played last, from the index saved before the restart."""
+    hass_storage[_storage_key(config_entry)] = {
+        "version": 1,
+        "key": _storage_key(config_entry),
+        "data": {"files": [[OTHER, 1800, DURATION // 1000]]},
+    }
+    await async_setup_players(hass, config_entry)
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_RESUME, {"entity_id": entity_id(hass, config_entry, "media_player")},
+        blocking=True, return_response=True,
+    )
+    assert response["players"] == {f"http://127.0.0.1:{config_entry.data['port']}": {"file": OTHER, "position": 1800}}
+    assert player.filepath == OTHER
+    assert sent(player, COMMAND_SEEK) == [{"position": "0:30:00"}]
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
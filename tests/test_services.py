@@ -0,0 +1,99 @@
+"""Tests of the services of the integration against two simulated players."""
+from __future__ import annotations
+
+from aiohttp.test_utils import TestServer
+import pytest
+import voluptuous as vol
+
+from homeassistant.components.media_player import DOMAIN as MEDIA_PLAYER_DOMAIN
+from homeassistant.components.remote import DOMAIN as REMOTE_DOMAIN
+from homeassistant.const import ATTR_ENTITY_ID
+
+from benchmarks.simulator import SimulatedPlayer, create_app
+from custom_components.mpchc.const import COMMAND_SEEK, DOMAIN, SERVICE_BROADCAST
+
+from .conftest import DURATION, add_player_entry, async_setup_players, entity_id, sent
+
+
+@pytest.fixture
+def second_player() -> SimulatedPlayer:
+    """Return a second simulated player, paused in another file."""
+    return SimulatedPlayer("D:\\Movies\\Other.mkv", DURATION, state=1)
+
+
+@pytest.fixture
+async def second_simulator(socket_enabled, second_player):
+    """Serve the second player on another local port."""
+    server = TestServer(create_app(second_player), host="127.0.0.1")
+    await server.start_server()
+    yield server
+    await server.close()
+
+
+@pytest.fixture
+async def players(hass, config_entry, second_simulator) -> list[str]:
+    """Set up both players, return their media player entities."""
+    second_entry = add_player_entry(hass, second_simulator.port)
+    await async_setup_players(hass, config_entry, second_entry)
+    yield [entity_id(hass, entry, MEDIA_PLAYER_DOMAIN) for entry in (config_entry, second_entry)]
+    for entry in (config_entry, second_entry):
+        await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def _broadcast(hass, **data) -> dict:
+    return await hass.services.async_call(DOMAIN, SERVICE_BROADCAST, data, blocking=True, return_response=True)
+
+
+async def test_broadcast_command(hass, players, player, second_player, simulator, second_simulator) -> None:
+    """The command is fired at the shared deadline on every player, which report their timings."""
+    response = await _broadcast(hass, entity_id=players, command="PLAY", delay=0.2)
+
+    assert ("887", {}) in player.commands
+    assert ("887", {}) in second_player.commands
+    urls = {f"http://127.0.0.1:{server.port}" for server in (simulator, second_simulator)}
+    assert set(response["players"]) == urls
+    for timings in response["players"].values():
+        assert set(timings) == {"sent_ms", "completed_ms"}
+        # No command latency measured yet : the requests are fired at the deadline
+        assert -5 < timings["sent_ms"] < 20
+        assert timings["completed_ms"] >= timings["sent_ms"]
+    assert response["spread_ms"] >= 0
+    assert all(hass.states.get(player_id).state == "playing" for player_id in players)
+
+
+async def test_broadcast_seek(hass, config_entry, players, player, second_player) -> None:
+    """A seek is sent to every player, the media player and the remote of a player count once."""
+    remote = entity_id(hass, config_entry, REMOTE_DOMAIN)
+    await _broadcast(hass, entity_id=[*players, remote], seek_position=90)
+    assert sent(player, COMMAND_SEEK) == [{"position": "0:01:30"}]
+    assert sent(second_player, COMMAND_SEEK) == [{"position": "0:01:30"}]
+
+
+async def test_broadcast_to_an_unreachable_player(hass, players, player, second_simulator) -> None:
+    """A player which can't be reached reports its error and rolls its optimistic state back."""
+    await second_simulator.close()
+    response = await _broadcast(hass, entity_id=players, command="PLAY", delay=0)
+
+    reached, unreachable = response["players"].values()
+    assert "completed_ms" in reached
+    assert "error" in unreachable and "completed_ms" not in unreachable
+    assert response["spread_ms"] == 0
+    assert hass.states.get(players[0]).state == "playing"
+    assert hass.states.get(players[1]).state == "paused"
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"command": "PLAYY"},
+        {"command": "PLAY", "seek_position": 10},
+        {},
+        {"command": "PLAY", "delay": 11},
+    ],
+)
+async def test_broadcast_validation(hass, players, player, data) -> None:
+    """Unknown commands, conflicting or missing actions and long delays are rejected before anything is sent."""
+    with pytest.raises(vol.Invalid):
+        await _broadcast(hass, entity_id=players, **data)
+    assert player.commands == []
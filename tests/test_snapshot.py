@@ -0,0 +1,72 @@
+"""Tests of the snapshot cache of the media player picture."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.mpchc import snapshot
+from custom_components.mpchc.snapshot import SnapshotCache
+
+
+@pytest.fixture
+def now(monkeypatch) -> list[float]:
+    """Return the settable clock of the cache."""
+    clock = [1000.0]
+    monkeypatch.setattr(snapshot, "monotonic", lambda: clock[0])
+    return clock
+
+
+class Camera:
+    """Return a new frame on every fetch."""
+
+    def __init__(self):
+        self.fetches = 0
+        self.fail = False
+
+    async def fetch(self) -> bytes | None:
+        if self.fail:
+            return None
+        self.fetches += 1
+        return f"frame {self.fetches}".encode()
+
+
+async def test_one_fetch_per_interval(now) -> None:
+    """A cached key is served without a fetch, another key waits for the interval."""
+    cache = SnapshotCache(min_interval=10)
+    camera = Camera()
+    assert await cache.async_get(("movie", 0), camera.fetch) == b"frame 1"
+    assert await cache.async_get(("movie", 0), camera.fetch) == b"frame 1"
+    now[0] += 10
+    assert await cache.async_get(("movie", 1), camera.fetch) == b"frame 2"
+    assert camera.fetches == 2
+
+
+async def test_file_change_within_the_interval(now) -> None:
+    """The frame of the previous file is never served for the new one."""
+    cache = SnapshotCache(min_interval=10)
+    camera = Camera()
+    assert await cache.async_get(("movie", 0), camera.fetch) == b"frame 1"
+    now[0] += 5
+    assert await cache.async_get(("other", 0), camera.fetch) is None
+    now[0] += 5
+    assert await cache.async_get(("other", 0), camera.fetch) == b"frame 2"
+    assert await cache.async_get(("movie", 0), camera.fetch) == b"frame 1"
+
+
+async def test_failed_fetch(now) -> None:
+    """A failed fetch returns no image rather than the frame of another key."""
+    cache = SnapshotCache(min_interval=10)
+    camera = Camera()
+    await cache.async_get(("movie", 0), camera.fetch)
+    now[0] += 10
+    camera.fail = True
+    assert await cache.async_get(("movie", 1), camera.fetch) is None
+
+
+async def test_least_recent_evicted(now) -> None:
+    """The cache keeps the most recently used snapshots."""
+    cache = SnapshotCache(max_size=2, min_interval=0)
+    camera = Camera()
+    for key in ("a", "b", "a", "c"):
+        await cache.async_get(key, camera.fetch)
+    assert await cache.async_get("a", camera.fetch) == b"frame 1"
+    assert await cache.async_get("b", camera.fetch) == b"frame 4"
@@ -0,0 +1,59 @@
+"""Tests of the player state model shared by the coordinator and the replay."""
+from __future__ import annotations
+
+from benchmarks.simulator import STATE_PAUSED, STATE_PLAYING, SimulatedPlayer
+from custom_components.mpchc.parser import parse_status, parse_variables
+from custom_components.mpchc.state import PlaybackState, PlayerState, StatusMerger
+
+from .conftest import DURATION, FILEPATH
+
+
+def _variables(player: SimulatedPlayer) -> PlayerState:
+    return PlayerState.from_variables(parse_variables(player.variables_html().encode()))
+
+
+def _status(player: SimulatedPlayer) -> dict[str, str]:
+    return parse_status(player.status_html().encode())
+
+
+def test_status_merged_into_the_variables() -> None:
+    """status.html updates the state once its file is known from a variables.html poll."""
+    player = SimulatedPlayer(FILEPATH, DURATION, state=STATE_PLAYING)
+    merger = StatusMerger()
+    state = _variables(player)
+    # The file reported by status.html is learnt from the variables.html read after it
+    assert merger.merge(state, _status(player)) is None
+    merger.learn(state)
+
+    player.command("888", {})
+    player.volume = 30
+    merged = merger.merge(state, _status(player))
+    assert merged.state is PlaybackState.PAUSED
+    assert merged.volume == 30
+    assert merged.filepath == FILEPATH
+
+
+def test_status_of_another_file_needs_the_variables() -> None:
+    """A new file or an unknown state string makes the coordinator read variables.html."""
+    player = SimulatedPlayer(FILEPATH, DURATION, state=STATE_PAUSED)
+    merger = StatusMerger()
+    state = _variables(player)
+    merger.merge(state, _status(player))
+    merger.learn(state)
+
+    player.open("D:\\Movies\\Other.mkv")
+    assert merger.merge(state, _status(player)) is None
+    status = _status(player)
+    status["statestring"] = "Lecture"
+    assert merger.merge(state, status) is None
+
+
+def test_failed_poll_forgets_the_status_file() -> None:
+    """The file of a status.html poll is not learnt from a later variables.html poll after a failure."""
+    player = SimulatedPlayer(FILEPATH, DURATION, state=STATE_PAUSED)
+    merger = StatusMerger()
+    state = _variables(player)
+    merger.merge(state, _status(player))
+    merger.reset()
+    merger.learn(state)
+    assert merger.merge(state, _status(player)) is None
@@ -0,0 +1,26 @@
+"""Tests of the performance counters."""
+from __future__ import annotations
+
+from custom_components.mpchc.stats import ClientStats
+
+
+def test_poll_latency_merges_status_and_variables() -> None:
+    """The poll latency covers the routine status.html polls and the variables.html refreshes."""
+    stats = ClientStats()
+    for _ in range(98):
+        stats.add_request("status", 4)
+    stats.add_request("variables", 40)
+    stats.add_request("variables", 400)
+    stats.add_request("command", 4000)
+
+    latency = stats.poll_latency()
+    assert latency.count == 100
+    assert latency.percentile(50) == 5
+    assert latency.percentile(99) == 50
+    assert latency.percentile(100) == 500
+    assert stats.latency["status"].count == 98
+
+
+def test_poll_latency_without_polls() -> None:
+    """No percentile is reported before the first poll."""
+    assert ClientStats().poll_latency().percentile(50) is None